@@ -6,13 +6,15 @@
 def make_config(cfg_name):
     import sys
     from pathlib import Path
-    from runpy import run_path
     module = sys.modules[__name__]
     mglobals = module.__dict__
     mglobals.pop("make_config", None)
     cfg_path = Path(module.__file__).parent/cfg_name
-    cfg_dict = ({key: val for key, val in run_path(str(cfg_path)).items()
-                 if not key.startswith("__")} if cfg_path.is_file() else {})
+    cfg_globals = {}
+    if cfg_path.is_file():
+        exec(compile(cfg_path.read_bytes(), str(cfg_path), "exec"), cfg_globals)
+    cfg_dict = {key: val for key, val in cfg_globals.items()
+                if not key.startswith("__")}
     mglobals.update(cfg_dict)
     mglobals.pop("__cached__", None)
     module.__all__ = tuple(cfg_dict.keys())
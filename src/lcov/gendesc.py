@@ -24,19 +24,86 @@ gendesc
 #use strict;
 #use warnings;
 
-from typing import List, Optional
-import argparse
+from typing import List, Iterable, Iterator, Optional
 import sys
-import re
+import os
+import io
 from pathlib import Path
+try:
+    import re2 as re
+except ImportError:
+    import re
 
 # Constants
 tool_name    = Path(__file__).stem
 lcov_version = "LCOV version " #+ `${abs_path(dirname($0))}/get_version.sh --full`
 lcov_url     = "http://ltp.sourceforge.net/coverage/lcov.php"
 
-
-def gen_description(input_filename: Path, output_filename: Optional[Path]):
+# Empty line handling states
+EMPTY_IGNORE  = 0  # Drop empty lines
+EMPTY_OBSERVE = 1  # Watch for an empty line inside of description text
+EMPTY_INSERT  = 2  # Preserve an empty line before next description line
+
+# Input line kinds
+LINE_JUNK  = 0
+LINE_NAME  = 1
+LINE_DESC  = 2
+LINE_EMPTY = 3
+
+# Size limit of input files converted to stdout at once by the fast path,
+# larger files are converted and written line by line
+SMALL_FILE_SIZE = 64 * 1024
+
+# Default buffer size of output files
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Test name pattern (character classes are spelled out in ASCII, so that
+# the accepted names do not depend on the regular expression engine)
+_RE_NAME = re.compile(rb"[0-9A-Za-z_][0-9A-Za-z_-]*[ \t\n\r\f\v]*")
+_is_test_name = _RE_NAME.fullmatch
+
+
+def classify_line(line: bytes) -> int:
+    """Return the kind of an input LINE of a description file."""
+    if not line or line.isspace():
+        return LINE_EMPTY
+    elif line[:1].isspace():
+        return LINE_DESC
+    elif _is_test_name(line):
+        return LINE_NAME
+    else:
+        return LINE_JUNK
+
+
+def convert_lines(lines: Iterable[bytes]) -> Iterator[bytes]:
+    """Convert the LINES of a description file into TN:/TD: output lines.
+    Lines are converted as they come, so LINES may be an open file.
+    """
+    empty_line = EMPTY_IGNORE
+    for line in lines:
+        kind = classify_line(line)
+        if kind == LINE_NAME:
+            # Matched test name
+            # Name starts with alphanum or _, continues with
+            # alphanum, _ or -
+            yield b"TN: " + line.rstrip() + b"\n"
+            empty_line = EMPTY_IGNORE
+        elif kind == LINE_DESC:
+            # Matched test description
+            if empty_line == EMPTY_INSERT:
+                # Write preserved empty line
+                yield b"TD: \n"
+            yield b"TD: " + line.strip() + b"\n"
+            empty_line = EMPTY_OBSERVE
+        elif kind == LINE_EMPTY:
+            # Matched empty line to preserve paragraph separation
+            # inside description text
+            if empty_line == EMPTY_OBSERVE:
+                empty_line = EMPTY_INSERT
+
+
+def gen_description(input_filename: Path, output_filename: Optional[Path],
+                    *, buffer_size: int = OUTPUT_BUFFER_SIZE):
     """Read text file INPUT_FILENAME and convert the contained description
     to a format as understood by genhtml, i.e.
 
@@ -44,55 +111,89 @@ def gen_description(input_filename: Path, output_filename: Optional[Path]):
        TD:<test description>
 
     If defined, write output to OUTPUT_FILENAME, otherwise to stdout.
+    BUFFER_SIZE specifies the buffer size of the output file.
 
     Die on error.
     """
+    if output_filename is None:
+        try:
+            small_file = input_filename.stat().st_size <= SMALL_FILE_SIZE
+        except OSError:
+            small_file = False
+        if small_file:
+            # Fast path: convert whole file and write it out at once
+            try:
+                data = input_filename.read_bytes()
+            except:
+                raise OSError(f"ERROR: cannot open {input_filename}!\n")
+            write_stdout(b"".join(convert_lines(data.splitlines())))
+            return
+
     try:
-        finput = input_filename.open("rt")
+        finput = input_filename.open("rb")
     except:
         raise OSError(f"ERROR: cannot open {input_filename}!\n")
     with finput:
+        # Process all lines in input file one by one, so that large
+        # files are never held in memory as a whole
+        if output_filename is None:
+            stream_stdout(convert_lines(finput))
+            return
+
         # Open output file for writing
         try:
-            foutput = output_filename.open("wt") if output_filename else sys.stdout
+            foutput = output_filename.open("wb", buffering=buffer_size)
         except:
             raise OSError(f"ERROR: cannot create {output_filename}!\n")
+        with foutput:
+            foutput.writelines(convert_lines(finput))
 
-        # Process all lines in input file
-        empty_line = "ignore"
-        for line in finput:
-            line = line.rstrip("\n")
-
-            match = re.match(r"^(\w[\w-]*)(\s*)$", line)
-            if match:
-                # Matched test name
-                # Name starts with alphanum or _, continues with
-                # alphanum, _ or -
-                print("TN: {}".format(match.group(1)), file=foutput)
-                empty_line = "ignore"
-                continue
-
-            match = re.match(r"^(\s+)(\S.*?)\s*$", line)
-            if match:
-                # Matched test description
-                if empty_line == "insert":
-                    # Write preserved empty line
-                    print("TD: ", file=foutput)
-                print("TD: {}".format(match.group(2)), file=foutput)
-                empty_line = "observe"
-                continue
-
-            match = re.match(r"^\s*$", line)
-            if match:
-                # Matched empty line to preserve paragraph separation
-                # inside description text
-                if empty_line == "observe":
-                    empty_line = "insert"
-                continue
-
-        # Close output file if defined
-        if output_filename:
-            foutput.close()
+
+def stream_stdout(lines: Iterable[bytes]):
+    """Write LINES to stdout as they come, bypassing its text layer if
+    possible. If stdout was replaced by a text stream without a binary
+    buffer (e.g. io.StringIO), LINES are written to it as text.
+    """
+    # Keep already printed text in order
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        sys.stdout.writelines(line.decode("utf-8", "surrogateescape")
+                              for line in lines)
+    else:
+        buffer.writelines(lines)
+        buffer.flush()
+
+
+def write_stdout(data: bytes):
+    """Write DATA to stdout, bypassing its text layer if possible.
+    If stdout was replaced by a text stream without a binary buffer
+    (e.g. io.StringIO), DATA is written to it as text.
+    """
+    # Keep already printed text in order
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        sys.stdout.write(data.decode("utf-8", "surrogateescape"))
+    else:
+        write_output(buffer, data)
+
+
+def write_output(foutput, data: bytes):
+    """Write DATA at once directly to the file descriptor of the binary
+    stream FOUTPUT, or through its write() if it has no file descriptor
+    (e.g. io.BytesIO).
+    """
+    foutput.flush()
+    try:
+        fd = foutput.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        foutput.write(data)
+        foutput.flush()
+    else:
+        data = memoryview(data)
+        while data:
+            data = data[os.write(fd, data):]
 
 
 def main(argv=sys.argv[1:]):
@@ -100,21 +201,16 @@ def main(argv=sys.argv[1:]):
     Convert a test case description file into a format as understood
     by genhtml.
     """
-    global tool_name, lcov_version, lcov_url
+    import argparse
 
     def warn_handler(msg: str):
-        global tool_name
         import warnings
         warnings.warn(f"{tool_name}: {msg}")
 
     def die_handler(msg: str):
-        global tool_name
         import sys
         sys.exit(f"{tool_name}: {msg}")
 
-    # $SIG{__WARN__} = warn_handler
-    # $SIG{__DIE__}  = die_handler
-
     # Parse command line options
     parser = argparse.ArgumentParser(prog=tool_name, description=main.__doc__,
                                      epilog=f"For more information see: {lcov_url}",
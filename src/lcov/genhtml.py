@@ -56,16 +56,20 @@ genhtml
 #use Getopt::Long;
 #use Digest::MD5 qw(md5_base64);
 
-from typing import List, Dict, Optional
-import argparse
+from typing import List, Tuple, Dict, Set, Optional
 import sys
+import os
+import io
 import re
 from pathlib import Path
-import gzip
+from functools import lru_cache
+from operator import itemgetter
+from collections import defaultdict
+from array import array
 
 from .lcov import add_counts
 from .lcov import add_fnccount
-from .lcov import combine_info_files
+from .lcov import read_info_files as combine_tracefiles
 from .lcov import brcount_db_get_found_and_hit
 from .lcov import combine_info_entries
 from .lcov import add_testbrdata
@@ -81,13 +85,14 @@ from .lcov import merge_checksums
 from .lcov import db_to_brcount
 from .lcov import compress_brcount
 from .lcov import rate
-from .genpng import gen_png
 from .util import reverse_dict
-from .util import apply_config
+from .util import config_bool
 from .util import system_no_output, NO_ERROR
 from .util import get_date_string
 from .util import strip_spaces_in_options
 from .util import parse_ignore_errors
+from .util import process_pool
+from .util import line_checksum, check_checksum_algo
 from .util import warn, die
 
 # Global constants
@@ -157,13 +162,45 @@ HEAD_DETAIL_SHOWN  = 3
 BR_LEN   = 3
 BR_OPEN  = 4
 BR_CLOSE = 5
+_get_br_len = itemgetter(BR_LEN)
 
 # Branch data combination types
 from .lcov import BR_SUB
 from .lcov import BR_ADD
 
 # Block value used for unnamed blocks
-UNNAMED_BLOCK_MARKER = vec(pack('b*', 1 x 32), 0, 32)
+UNNAMED_BLOCK_MARKER = 0xFFFFFFFF
+
+# Size limit of the tracefile cache
+INFO_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+
+class OverviewEntry:
+    """Coverage counts, link and sort rates of one file or directory
+    listed in an overview page."""
+
+    __slots__ = ("ln_found", "ln_hit",
+                 "fn_found", "fn_hit",
+                 "br_found", "br_hit",
+                 "link",
+                 "ln_rate", "fn_rate", "br_rate")
+
+    def __init__(self, ln_found: int, ln_hit: int,
+                       fn_found: int, fn_hit: int,
+                       br_found: int, br_hit: int,
+                       link: str):
+        self.ln_found = ln_found
+        self.ln_hit   = ln_hit
+        self.fn_found = fn_found
+        self.fn_hit   = fn_hit
+        self.br_found = br_found
+        self.br_hit   = br_hit
+        self.link     = link
+        # Relative values used for sorting
+        self.ln_rate  = get_rate(ln_found, ln_hit)
+        self.fn_rate  = get_rate(fn_found, fn_hit)
+        self.br_rate  = get_rate(br_found, br_hit)
+
 
 # Error classes which users may specify to ignore during processing
 ERROR_SOURCE = 0
@@ -173,17 +210,23 @@ ERROR_ID = {
 
 # Global variables & initialization
 info_data: Dict[str, ???] = {}  # Hash containing all data from .info file
-our @opt_dir_prefix;    # Array of prefixes to remove from all sub directories
-our @dir_prefix;
+dir_index: Dict[str, List[str]] = {}  # Directory -> files of info_data in it
+args.dir_prefix: List[str] = []  # Array of prefixes to remove from all sub directories
+dir_prefix: List[str] = []
+created_dirs: Set[str] = set()  # Absolute paths of directories known to exist
+demangled_names: Dict[str, str] = {}  # Function name -> demangled function name
+file_executor = None  # Worker pool generating the pages of source files
+fileview_sortlist: List[int] = []  # Sort types of directory views
+funcview_sortlist: List[int] = []  # Sort types of function views
 test_description: Dict[str, str] = {}  # Hash containing test descriptions if available
 our $date = get_date_string()
 
 args.info_filenames: List[Path] = [] # List of .info files to use as data source
 args.test_title: Optional[str] = None  # Title for output as written to each page header
 our $output_directory;    # Name of directory in which to store output
-args.base_filename: Optional[Path] = None  # Optional name of file containing baseline data
+args.base_filename: Optional[str] = None  # Optional name of file containing baseline data
 our $desc_filename;    # Name of file containing test descriptions
-options.css_filename: Optional[Path] = None  # Optional name of external stylesheet file to use
+options.css_filename: Optional[str] = None  # Optional name of external stylesheet file to use
 args.quiet: bool = False  # If set, suppress information messages
 args.help:  bool = False  # Help option flag
 args.version: bool = False  # Version option flag
@@ -201,9 +244,9 @@ options.no_sourceview: bool = False  # If set, do not create a source code view
 options.highlight: Optional[bool] = None  # If set, highlight lines covered by converted data only
 options.legend: bool = False  # If set, include legend in output
 options.tab_size: int = 8  # Number of spaces to use in place of tab
-our $config;        # Configuration file contents
-options.html_prolog_file: Optional[Path] = None  # Custom HTML prolog file (up to and including <body>)
-options.html_epilog_file: Optional[Path] = None  # Custom HTML epilog file (from </body> onwards)
+config: Optional[Dict[str, str]] = None  # Configuration file contents
+options.html_prolog_file: Optional[str] = None  # Custom HTML prolog file (up to and including <body>)
+options.html_epilog_file: Optional[str] = None  # Custom HTML epilog file (from </body> onwards)
 html_prolog: Optional[str] = None  # Actual HTML prolog
 html_epilog: Optional[str] = None  # Actual HTML epilog
 options.html_ext:  str  = "html"   # Extension for generated HTML files
@@ -213,223 +256,76 @@ options.demangle_cpp_tool:   str = "c++filt"  # Default demangler for C++ functi
 options.demangle_cpp_params: str = ""         # Extra parameters for demangling
 args.ignore_errors:     List[str] = []    # Ignore certain error classes during processing
 ignore: Dict[int, bool] = {}  # List of errors to ignore (array)
-args.config_file: Optional[Path] = None  # User-specified configuration file location
+args.config_file: Optional[str] = None  # User-specified configuration file location
 args.rc:          Dict[str, str] = {}
+args.jobs: int = 1  # Number of parallel jobs (tracefile reading, page generation)
+args.cache: bool = False  # If set, use the tracefile cache
 options.missed;    # List/sort lines by missed counts
 options.dark_mode: bool = False  # Use dark mode palette or normal
+options.checksum_algo: str = "md5"  # Algorithm used for line checksums
 options.charset: str = "UTF-8"    # Default charset for HTML pages
 options.lcov_function_coverage: bool = True
 options.lcov_branch_coverage:   bool = False
 options.desc_html:              bool = False  # lcovrc: genhtml_desc_html
 
 fileview_sortnames = ("", "-sort-l", "-sort-f", "-sort-b")
-our @rate_name = ("Lo", "Med", "Hi")
-our @rate_png  = ("ruby.png", "amber.png", "emerald.png")
+rate_name = ("Lo", "Med", "Hi")
+rate_png  = ("ruby.png", "amber.png", "emerald.png")
 
 html_templates_dir: Path = Path(__file__)/"html"
 
 cwd = Path.cwd()  # Current working directory
 
-#
-# Code entry point
-#
-
-# Check command line for a configuration file name
-Getopt::Long::Configure("pass_through", "no_auto_abbrev")
-GetOptions("config-file=s" => \Path(args.config_file),
-           "rc=s%"         => \args.rc)
-Getopt::Long::Configure("default")
-
-# Remove spaces around rc options
-args.rc = strip_spaces_in_options(args.rc)
-# Read configuration file if available
-$config = read_lcov_config_file(args.config_file)
-
-if $config or args.rc:
-{
-    # Copy configuration file and --rc values to variables
-    apply_config({
-        "genhtml_css_file"            => \Path(options.css_filename),
-        "genhtml_hi_limit"            => \options.hi_limit,
-        "genhtml_med_limit"           => \options.med_limit,
-        "genhtml_line_field_width"    => \options.line_field_width,
-        "genhtml_overview_width"      => \options.overview_width,
-        "genhtml_nav_resolution"      => \options.nav_resolution,
-        "genhtml_nav_offset"          => \options.nav_offset,
-        "genhtml_keep_descriptions"   => \options.keep_descriptions,
-        "genhtml_no_prefix"           => \options.no_prefix,
-        "genhtml_no_source"           => \options.no_sourceview,
-        "genhtml_num_spaces"          => \options.tab_size,
-        "genhtml_highlight"           => \options.highlight,
-        "genhtml_legend"              => \options.legend,
-        "genhtml_html_prolog"         => \Path(options.html_prolog_file),
-        "genhtml_html_epilog"         => \Path(options.html_epilog_file),
-        "genhtml_html_extension"      => \options.html_ext,
-        "genhtml_html_gzip"           => \options.html_gzip,
-        "genhtml_precision"           => \options.default_precision,
-        "genhtml_function_hi_limit"   => \options.fn_hi_limit,
-        "genhtml_function_med_limit"  => \options.fn_med_limit,
-        "genhtml_branch_hi_limit"     => \options.br_hi_limit,
-        "genhtml_branch_med_limit"    => \options.br_med_limit,
-        "genhtml_branch_field_width"  => \options.br_field_width,
-        "genhtml_sort"                => \options.sort,
-        "genhtml_charset"             => \options.charset,
-        "genhtml_desc_html"           => \options.desc_html,
-        "genhtml_demangle_cpp"        => \options.demangle_cpp,
-        "genhtml_demangle_cpp_tool"   => \options.demangle_cpp_tool,
-        "genhtml_demangle_cpp_params" => \options.demangle_cpp_params,
-        "genhtml_dark_mode"           => \options.dark_mode,
-        "genhtml_missed"              => \options.missed,
-        "genhtml_function_coverage"   => \options.fn_coverage,
-        "genhtml_branch_coverage"     => \options.br_coverage,
-        "lcov_function_coverage"      => \options.lcov_function_coverage,
-        "lcov_branch_coverage"        => \options.lcov_branch_coverage,
-        });
-}
-
-# Copy related values if not specified
-if options.fn_hi_limit  is None: options.fn_hi_limit  = options.hi_limit
-if options.fn_med_limit is None: options.fn_med_limit = options.med_limit
-if options.br_hi_limit  is None: options.br_hi_limit  = options.hi_limit
-if options.br_med_limit is None: options.br_med_limit = options.med_limit
-if options.fn_coverage  is None: options.fn_coverage  = options.lcov_function_coverage
-if options.br_coverage  is None: options.br_coverage  = options.lcov_branch_coverage
-
-# Parse command line options
-if (!GetOptions(
-        "output-directory|o=s" => \$output_directory,
-        "title|t=s"            => \args.test_title,
-        "description-file|d=s" => \$desc_filename,
-        "keep-descriptions|k"  => \options.keep_descriptions,
-        "css-file|c=s"         => \Path(options.css_filename),
-        "baseline-file|b=s"    => \Path(args.base_filename),
-        "prefix|p=s"           => \@opt_dir_prefix,
-        "num-spaces=i"         => \options.tab_size,
-        "no-prefix"            => \options.no_prefix,
-        "no-sourceview"        => \options.no_sourceview,
-        "show-details|s"       => \options.show_details,
-        "frames|f"             => \args.frames,
-        "highlight"            => \options.highlight,
-        "legend"               => \options.legend,
-        "quiet|q"              => \args.quiet,
-        "help|h|?"             => \args.help,
-        "version|v"            => \args.version,
-        "html-prolog=s"        => \Path(options.html_prolog_file),
-        "html-epilog=s"        => \Path(options.html_epilog_file),
-        "html-extension=s"     => \options.html_ext,
-        "html-gzip"            => \options.html_gzip,
-        "function-coverage"    => \options.fn_coverage,
-        "no-function-coverage" => \options.no_fn_coverage,
-        "branch-coverage"      => \options.br_coverage,
-        "no-branch-coverage"   => \options.no_br_coverage,
-        "sort"                 => \options.sort,
-        "no-sort"              => \options.no_sort,
-        "demangle-cpp"         => \options.demangle_cpp,
-        "ignore-errors=s"      => \args.ignore_errors,
-        "config-file=s"        => \Path(args.config_file),
-        "rc=s%"                => \args.rc,
-        "precision=i"          => \options.default_precision,
-        "missed"               => \options.missed,
-        "dark-mode"            => \options.dark_mode,
-        )):
-    print(f"Use {tool_name} --help to get usage information", file=sys.stderr)
-    sys.exit(1)
-
-# Merge options
-if options.no_fn_coverage:
-    options.fn_coverage = False
-if options.no_br_coverage:
-    options.br_coverage = False
-if options.no_sort:
-    options.sort = False
-
-args.info_filenames = [Path(fname) for fname in @ARGV]
-
-# Check for help option
-if args.help:
-    print_usage(sys.stdout)
-    sys.exit(0)
-
-# Check for version option
-if args.version:
-    print(f"{tool_name}: {lcov_version}")
-    sys.exit(0)
-
-# Determine which errors the user wants us to ignore
-parse_ignore_errors(args.ignore_errors, ignore)
-# Split the list of prefixes if needed
-parse_dir_prefix(@opt_dir_prefix)
-
-# Check for info filename
-if not args.info_filenames:
-    die("No filename specified\n"
-        f"Use {tool_name} --help to get usage information")
-
-# Generate a title if none is specified
-if not args.test_title:
-    if len(args.info_filenames) == 1:
-        # Only one filename specified, use it as title
-        args.test_title = basename(args.info_filenames[0])
-    else:
-        # More than one filename specified, used default title
-        args.test_title = "unnamed"
-
-# Make sure css_filename is an absolute path (in case we're changing
-# directories)
-if options.css_filename is not None:
-    if not (str(options.css_filename) =~ /^\/(.*)$/):
-        options.css_filename = cwd/options.css_filename
-
-# Make sure tab_size is within valid range
-if options.tab_size < 1:
-    print(f"ERROR: invalid number of spaces specified: {options.tab_size}!",
-          file=sys.stderr)
-    sys.exit(1)
-
-# Get HTML prolog and epilog
-html_prolog = get_html_prolog(options.html_prolog_file or None)
-html_epilog = get_html_epilog(options.html_epilog_file or None)
-
-# Issue a warning if --no-sourceview is enabled together with --frames
-if options.no_sourceview and args.frames is not None:
-    warn("WARNING: option --frames disabled because --no-sourceview "
-         "was specified!")
-    args.frames = None
-
-# Issue a warning if --no-prefix is enabled together with --prefix
-if options.no_prefix and @dir_prefix:
-    warn("WARNING: option --prefix disabled because --no-prefix was "
-         "specified!")
-    @dir_prefix = None
-
-fileview_sortlist: List[int] = [SORT_FILE]
-funcview_sortlist: List[int] = [SORT_FILE]
-if options.sort:
-    fileview_sortlist.append(SORT_LINE)
-    if options.fn_coverage:
-        fileview_sortlist.append(SORT_FUNC)
-    if options.br_coverage:
-        fileview_sortlist.append(SORT_BRANCH)
-    funcview_sortlist.append(SORT_LINE)
-
-# Ensure that the c++filt tool is available when using --demangle-cpp
-if options.demangle_cpp:
-    if system_no_output(3, options.demangle_cpp_tool, "--version")[0] != NO_ERROR:
-        die(f"ERROR: could not find {options.demangle_cpp_tool} tool needed for "
-            "--demangle-cpp")
-
-# Make sure precision is within valid range
-if not (1 <= options.default_precision <= 4):
-    die("ERROR: specified precision is out of range (1 to 4)")
-
-# Make sure output_directory exists, create it if necessary
-if $output_directory:
-    create_sub_dir(Path($output_directory), exist_ok=True)
-
-# Do something
-gen_html()
-
-sys.exit(0)
+# Configuration file keywords: (keyword, options attribute, value type)
+CONFIG_MAP = (
+    ("genhtml_css_file",            "css_filename",           str),
+    ("genhtml_hi_limit",            "hi_limit",               int),
+    ("genhtml_med_limit",           "med_limit",              int),
+    ("genhtml_line_field_width",    "line_field_width",       int),
+    ("genhtml_overview_width",      "overview_width",         int),
+    ("genhtml_nav_resolution",      "nav_resolution",         int),
+    ("genhtml_nav_offset",          "nav_offset",             int),
+    ("genhtml_keep_descriptions",   "keep_descriptions",      config_bool),
+    ("genhtml_no_prefix",           "no_prefix",              config_bool),
+    ("genhtml_no_source",           "no_sourceview",          config_bool),
+    ("genhtml_num_spaces",          "tab_size",               int),
+    ("genhtml_highlight",           "highlight",              config_bool),
+    ("genhtml_legend",              "legend",                 config_bool),
+    ("genhtml_html_prolog",         "html_prolog_file",       str),
+    ("genhtml_html_epilog",         "html_epilog_file",       str),
+    ("genhtml_html_extension",      "html_ext",               str),
+    ("genhtml_html_gzip",           "html_gzip",              config_bool),
+    ("genhtml_precision",           "default_precision",      int),
+    ("genhtml_function_hi_limit",   "fn_hi_limit",            int),
+    ("genhtml_function_med_limit",  "fn_med_limit",           int),
+    ("genhtml_branch_hi_limit",     "br_hi_limit",            int),
+    ("genhtml_branch_med_limit",    "br_med_limit",           int),
+    ("genhtml_branch_field_width",  "br_field_width",         int),
+    ("genhtml_sort",                "sort",                   config_bool),
+    ("genhtml_charset",             "charset",                str),
+    ("genhtml_desc_html",           "desc_html",              config_bool),
+    ("genhtml_demangle_cpp",        "demangle_cpp",           config_bool),
+    ("genhtml_demangle_cpp_tool",   "demangle_cpp_tool",      str),
+    ("genhtml_demangle_cpp_params", "demangle_cpp_params",    str),
+    ("genhtml_dark_mode",           "dark_mode",              config_bool),
+    ("genhtml_missed",              "missed",                 config_bool),
+    ("genhtml_function_coverage",   "fn_coverage",            config_bool),
+    ("genhtml_branch_coverage",     "br_coverage",            config_bool),
+    ("geninfo_checksum_algo",       "checksum_algo",          str),
+    ("lcov_function_coverage",      "lcov_function_coverage", config_bool),
+    ("lcov_branch_coverage",        "lcov_branch_coverage",   config_bool),
+)
+
+# Options taking the value of a related option if not specified:
+# (options attribute, attribute of related option)
+OPTION_FALLBACKS = (
+    ("fn_hi_limit",  "hi_limit"),
+    ("fn_med_limit", "med_limit"),
+    ("br_hi_limit",  "hi_limit"),
+    ("br_med_limit", "med_limit"),
+    ("fn_coverage",  "lcov_function_coverage"),
+    ("br_coverage",  "lcov_branch_coverage"),
+)
 
 
 def print_usage(fhandle):
@@ -448,6 +344,8 @@ Misc:
       --config-file FILENAME        Specify configuration file location
       --rc SETTING=VALUE            Override configuration file setting
       --ignore-errors ERRORS        Continue after ERRORS (source)
+  -j, --jobs NUM                    Use up to NUM parallel jobs
+      --cache                       Reuse parsed data of unchanged tracefiles
 
 Operation:
   -o, --output-directory OUTDIR     Write HTML output to OUTDIR
@@ -459,6 +357,7 @@ Operation:
       --no-prefix                   Do not remove prefix from directory names
       --(no-)function-coverage      Enable (disable) function coverage display
       --(no-)branch-coverage        Enable (disable) branch coverage display
+      --checksum-algo ALGO          Verify line checksums with ALGO (md5, sha256, blake3)
 
 HTML output:
   -f, --frames                      Use HTML frames for source code view
@@ -492,50 +391,58 @@ def gen_html():
     global options
     global args
     global info_data
+    global dir_index
+    global file_executor
     global test_description
     global fileview_sortnames
     global fileview_sortlist
 
+    # Drop cached HTML of a previous run made with other options
+    escape_html_name.cache_clear()
+    get_html_epilog_code.cache_clear()
+    get_rate_stats.cache_clear()
+
     try:
         # Read in all specified .info files
-        for fname in args.info_filenames:
-            current = read_info_file(fname)
-            # Combine current with info_data
-            info_data = combine_info_files(info_data, current)
+        info_data = read_info_files(args.info_filenames, args.jobs,
+                                    use_cache=args.cache)
 
         info("Found %d entries.", len(info_data))
 
         # Read and apply baseline data if specified
         if args.base_filename:
             # Read baseline file
-            info(f"Reading baseline file {base_filename}")
+            info(f"Reading baseline file {args.base_filename}")
             base_data = read_info_file(args.base_filename)
             info("Found %d entries.", len(base_data))
             # Apply baseline
             info("Subtracting baseline data.")
             info_data = apply_baseline(info_data, base_data)
 
-        dir_list: List[str] = get_dir_list(info_data.keys())
+        # Demangle all function names at once
+        if options.demangle_cpp:
+            demangle_names(get_fn_list(info_data))
+
+        dir_index = get_dir_index(info_data.keys())
+        dir_list: List[str] = sorted(dir_index.keys())
 
         if options.no_prefix:
             # User requested that we leave filenames alone
             info("User asked not to remove filename prefix")
-        elif not @dir_prefix:
+        elif not dir_prefix:
             # Get prefix common to most directories in list
             prefix = get_prefix(1, info_data.keys())
             if prefix:
                 info(f"Found common filename prefix \"{prefix}\"")
-                $dir_prefix[0] = prefix
+                dir_prefix.append(prefix)
             else:
                 info("No common filename prefix found!")
                 options.no_prefix = True
         else:
-            msg = "Using user-specified filename prefix "
-            for $i in (0 .. $#dir_prefix):
-                $dir_prefix[$i] =~ s/\/+$//;
-                unless 0 == $i: msg += ", "
-                msg += "\"" . $dir_prefix[$i] . "\"";
-            info(msg)
+            # Remove trailing slashes
+            dir_prefix[:] = [prefix.rstrip("/") for prefix in dir_prefix]
+            info("Using user-specified filename prefix " +
+                 ", ".join(f"\"{prefix}\"" for prefix in dir_prefix))
 
         # Read in test description file if specified
         if $desc_filename:
@@ -553,68 +460,82 @@ def gen_html():
             except:
                 die("ERROR: cannot change to directory $output_directory!")
 
-        info("Writing .css and .png files.")
-        write_css_file()
-        write_png_files()
-
-        if options.html_gzip:
-            info("Writing .htaccess file.")
-            write_htaccess_file()
+        # Write the small support files concurrently
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            info("Writing .css and .png files.")
+            futures = [executor.submit(write_css_file)]
+            futures += [executor.submit(write_png_file, fname, content)
+                        for fname, content in get_png_files().items()]
+            if options.html_gzip:
+                info("Writing .htaccess file.")
+                futures.append(executor.submit(write_htaccess_file))
+            # Re-raise errors (die) of the writers
+            for future in futures:
+                future.result()
 
         info("Generating output.")
 
+        # Generate pages of source files in worker processes if requested
+        if args.jobs > 1:
+            file_executor = process_pool(args.jobs, set_worker_state,
+                                         (get_worker_state(),))
+
         # Process each subdirectory and collect overview information
-        overview: Dict[???, ???] = {}
-        total_ln_found = 0
-        total_ln_hit   = 0
-        total_fn_found = 0
-        total_fn_hit   = 0
-        total_br_found = 0
-        total_br_hit   = 0
+        overview: Dict[str, OverviewEntry] = {}
+        # Counts of all directories, one packed 64-bit column per counter:
+        # ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit
+        dir_counts = tuple(array("q") for _ in range(6))
         for dir_name in dir_list:
 
+            counts = process_dir(dir_name)
+            for column, count in zip(dir_counts, counts):
+                column.append(count)
             (ln_found, ln_hit,
              fn_found, fn_hit,
-             br_found, br_hit) = process_dir(dir_name)
+             br_found, br_hit) = counts
 
             # Handle files in root directory gracefully
             if dir_name == "": dir_name = "root"
             # Remove prefix if applicable
-            if not options.no_prefix and @dir_prefix:
-                # Match directory names beginning with one of @dir_prefix
-                dir_name = apply_prefix(dir_name, @dir_prefix)
+            if not options.no_prefix and dir_prefix:
+                # Match directory names beginning with one of dir_prefix
+                dir_name = apply_prefix(dir_name, tuple(dir_prefix))
 
             # Generate name for directory overview HTML page
-            link_name = dir_name[1:] if re.match(r"^/(.*)$", dir_name) else dir_name
+            link_name = dir_name[1:] if dir_name.startswith("/") else dir_name
             link_name += f"/index.{options.html_ext}"
 
-            overview[dir_name] = [ln_found, ln_hit,
-                                  fn_found, fn_hit,
-                                  br_found, br_hit,
-                                  link_name,
-                                  get_rate(ln_found, ln_hit),
-                                  get_rate(fn_found, fn_hit),
-                                  get_rate(br_found, br_hit)]
-            total_ln_found += ln_found
-            total_ln_hit   += ln_hit
-            total_fn_found += fn_found
-            total_fn_hit   += fn_hit
-            total_br_found += br_found
-            total_br_hit   += br_hit
+            overview[dir_name] = OverviewEntry(ln_found, ln_hit,
+                                               fn_found, fn_hit,
+                                               br_found, br_hit,
+                                               link_name)
+
+        # All pages of source files are written
+        if file_executor is not None:
+            file_executor.shutdown()
+            file_executor = None
+
+        # Sum up the counts of all directories column by column
+        (total_ln_found, total_ln_hit,
+         total_fn_found, total_fn_hit,
+         total_br_found, total_br_hit) = map(sum, dir_counts)
 
         # Generate overview page
         info("Writing directory view page.")
 
         # Create sorted pages
+        sorted_views = get_sorted_views(overview, fileview_sortlist)
         for sort_type in fileview_sortlist:
             write_dir_page(fileview_sortnames[sort_type],
                            Path("."), Path(""), args.test_title, None,
                            total_ln_found, total_ln_hit,
                            total_fn_found, total_fn_hit,
                            total_br_found, total_br_hit,
-                           \%overview,
+                           overview,
                            {}, {}, {},
-                           0, sort_type)
+                           0, sort_type,
+                           sorted_names=sorted_views[sort_type])
 
         # Check if there are any test case descriptions to write out
         if test_description:
@@ -632,20 +553,51 @@ def gen_html():
         os.chdir(cwd)
 
 
-def html_create(filename: Path) -> object:
-    """ """
-    global options
-    if options.html_gzip:
+class HTMLFile(io.StringIO):
+    """In-memory text buffer collecting a whole HTML page. The page is
+    encoded (and compressed, if requested) and written to its file with
+    a single write when the buffer is closed."""
+
+    def __init__(self, fhandle, encoding: str, compress: bool):
+        super().__init__()
+        self._fhandle  = fhandle
+        self._encoding = encoding
+        self._compress = compress
+
+    def close(self):
+        if self.closed: return
         try:
-            html_handle = gzip.open(str(filename), "wt") as:
-        except:
+            data = self.getvalue().encode(self._encoding)
+            if self._compress:
+                import gzip
+                # Fastest compression level: HTML compresses well anyway
+                data = gzip.compress(data, compresslevel=1)
+            # Write directly to the unbuffered file, skipping the copy
+            # into an intermediate buffer
+            with self._fhandle:
+                data = memoryview(data)
+                while data:
+                    data = data[self._fhandle.write(data):]
+        finally:
+            super().close()
+
+
+def html_create(filename: Path) -> HTMLFile:
+    """Open FILENAME for writing HTML output, compressing it in-process
+    if --html-gzip was specified. Output is buffered in memory and written
+    out at once when the returned handle is closed.
+
+    Die on error.
+    """
+    global options
+    try:
+        fhandle = filename.open("wb", buffering=0)
+    except:
+        if options.html_gzip:
             die(f"ERROR: cannot open {filename} for writing (gzip)!")
-    else:
-        try:
-            html_handle = filename.open("wt")
-        except:
+        else:
             die(f"ERROR: cannot open {filename} for writing!")
-    return html_handle
+    return HTMLFile(fhandle, options.charset, options.html_gzip)
 
 # NOK
 def write_dir_page($name,
@@ -653,9 +605,10 @@ def write_dir_page($name,
                    total_ln_found: int, total_ln_hit: int,
                    total_fn_found: int, total_fn_hit: int,
                    total_br_found: int, total_br_hit: int,
-                   overview: Dict[str, List],
+                   overview: Dict[str, OverviewEntry],
                    $testhash, $testfnchash, $testbrhash,
-                   header_type: int, sort_type: int):
+                   header_type: int, sort_type: int,
+                   *, sorted_names: Optional[List[str]] = None):
     """ """
     global options
 
@@ -679,39 +632,36 @@ def write_dir_page($name,
 
         write_file_table(html_handle, Path($base_dir), overview,
                          $testhash, $testfnchash, $testbrhash,
-                         header_type != HDR_DIR, sort_type);
+                         header_type != HDR_DIR, sort_type,
+                         sorted_names=sorted_names)
 
         write_html_epilog(html_handle, Path($base_dir))
 
-# NOK
-def process_dir(abs_dir):
-    # process_dir(dir_name)
-    """ """
+def process_dir(abs_dir: str) -> Tuple[int, int, int, int, int, int]:
+    """Generate the source code pages of all files located in directory
+    ABS_DIR and the overview pages of that directory.
+
+    If a worker pool was set up by gen_html(), the pages of the individual
+    files are generated in parallel.
+
+    Return the line, function and branch found/hit counts of the directory.
+    """
     global options
     global args
     global info_data
+    global dir_index
     global fileview_sortlist
+    global file_executor
 
-    my %overview;
-    my $ln_found;
-    my $ln_hit;
-    my $fn_found;
-    my $fn_hit;
-    my $br_found;
-    my $br_hit;
-    my $base_name;
-    my $extension;
-    my @sort_list;
-
-    rel_dir = $abs_dir
+    rel_dir = abs_dir
     # Remove prefix if applicable
     if not options.no_prefix:
-        # Match directory name beginning with one of @dir_prefix
-        rel_dir = apply_prefix(rel_dir, @dir_prefix)
+        # Match directory name beginning with one of dir_prefix
+        rel_dir = apply_prefix(rel_dir, tuple(dir_prefix))
 
     trunc_dir = rel_dir
     # Remove leading /
-    if rel_dir =~ /^\/(.*)$/:
+    if rel_dir.startswith("/"):
         rel_dir = rel_dir[1:]
 
     # Handle files in root directory gracefully
@@ -724,10 +674,26 @@ def process_dir(abs_dir):
 
     # Match filenames which specify files in this directory, not including
     # sub-directories
+    filenames = dir_index.get(abs_dir, [])
+
+    if file_executor is not None and len(filenames) > 1:
+        # Pages of different files are independent of each other,
+        # results come back in the order of filenames
+        results = file_executor.map(process_file,
+                                    [trunc_dir] * len(filenames),
+                                    [rel_dir]   * len(filenames),
+                                    filenames,
+                                    [info_data[filename]
+                                     for filename in filenames])
+    else:
+        results = (process_file(trunc_dir, rel_dir, filename,
+                                info_data[filename])
+                   for filename in filenames)
 
-    %testhash    = {}
-    %testfnchash = {}
-    %testbrhash  = {}
+    overview:    Dict[str, OverviewEntry] = {}
+    testhash:    Dict[str, object] = {}
+    testfnchash: Dict[str, object] = {}
+    testbrhash:  Dict[str, object] = {}
 
     total_ln_found = 0
     total_ln_hit   = 0
@@ -736,36 +702,31 @@ def process_dir(abs_dir):
     total_br_found = 0
     total_br_hit   = 0
 
-    for filename in (grep(/^\Q$abs_dir\E\/[^\/]*$/,keys(%info_data))):
-        my $page_link;
-        my $func_link;
+    for filename, result in zip(filenames, results):
 
         (ln_found, ln_hit,
          fn_found, fn_hit,
          br_found, br_hit,
-         testdata, testfncdata, testbrdata) = process_file(trunc_dir, $rel_dir, filename)
+         testdata, testfncdata, testbrdata) = result
 
-        $base_name = basename($filename)
+        base_name = os.path.basename(filename)
 
         if options.no_sourceview:
-            $page_link = "";
+            page_link = ""
         elif args.frames:
             # Link to frameset page
-            $page_link = f"$base_name.gcov.frameset.{options.html_ext}"
+            page_link = f"{base_name}.gcov.frameset.{options.html_ext}"
         else:
             # Link directory to source code view page
-            $page_link = f"$base_name.gcov.{options.html_ext}"
-        $overview[base_name] = [ln_found, ln_hit,
-                                fn_found, fn_hit,
-                                br_found, br_hit,
-                                $page_link,
-                                get_rate(ln_found, ln_hit),
-                                get_rate(fn_found, fn_hit),
-                                get_rate(br_found, br_hit)]
+            page_link = f"{base_name}.gcov.{options.html_ext}"
+        overview[base_name] = OverviewEntry(ln_found, ln_hit,
+                                            fn_found, fn_hit,
+                                            br_found, br_hit,
+                                            page_link)
 
-        $testhash[base_name]    = testdata
-        $testfnchash[base_name] = testfncdata
-        $testbrhash[base_name]  = testbrdata
+        testhash[base_name]    = testdata
+        testfnchash[base_name] = testfncdata
+        testbrhash[base_name]  = testbrdata
 
         total_ln_found += ln_found
         total_ln_hit   += ln_hit
@@ -774,27 +735,30 @@ def process_dir(abs_dir):
         total_br_found += br_found
         total_br_hit   += br_hit
 
-    # Create sorted pages
+    # Create sorted pages (sort each way only once for both page variants)
+    sorted_views = get_sorted_views(overview, fileview_sortlist)
     for sort_type in fileview_sortlist:
         # Generate directory overview page (without details)
         write_dir_page(fileview_sortnames[sort_type],
-                       Path($rel_dir), Path($base_dir), args.test_title, Path(trunc_dir),
+                       Path(rel_dir), Path(base_dir), args.test_title, Path(trunc_dir),
                        total_ln_found, total_ln_hit,
                        total_fn_found, total_fn_hit,
                        total_br_found, total_br_hit,
-                       \%overview,
+                       overview,
                        {}, {}, {},
-                       1, sort_type)
+                       1, sort_type,
+                       sorted_names=sorted_views[sort_type])
         if not options.show_details: continue
         # Generate directory overview page including details
         write_dir_page("-detail" + fileview_sortnames[sort_type],
-                       Path($rel_dir), Path($base_dir), args.test_title, Path(trunc_dir),
+                       Path(rel_dir), Path(base_dir), args.test_title, Path(trunc_dir),
                        total_ln_found, total_ln_hit,
                        total_fn_found, total_fn_hit,
                        total_br_found, total_br_hit,
-                       \%overview,
-                       \%testhash, \%testfnchash, \%testbrhash,
-                       1, sort_type)
+                       overview,
+                       testhash, testfnchash, testbrhash,
+                       1, sort_type,
+                       sorted_names=sorted_views[sort_type])
 
     # Calculate resulting line counts
     return (total_ln_found, total_ln_hit,
@@ -802,14 +766,15 @@ def process_dir(abs_dir):
             total_br_found, total_br_hit)
 
 # NOK
-def process_file($trunc_dir, $rel_dir, $filename) -> Tuple ???:
-
+def process_file($trunc_dir, $rel_dir, $filename, entry) -> Tuple ???:
+    """Generate the pages of source file FILENAME from its info data ENTRY.
+    May run in a worker process, see get_worker_state().
+    """
     global options
     global args
-    global info_data
     global funcview_sortlist
 
-    info("Processing file {}".format(apply_prefix(filename, @dir_prefix)))
+    info("Processing file {}".format(apply_prefix(filename, tuple(dir_prefix))))
 
     base_name: str = basename($filename)
     base_dir:  str = get_relative_base_path($rel_dir)
@@ -822,7 +787,7 @@ def process_file($trunc_dir, $rel_dir, $filename) -> Tuple ???:
      testbrdata,  sumbrcount,
      ln_found, ln_hit,
      fn_found, fn_hit,
-     br_found, br_hit) = get_info_entry(info_data[filename])
+     br_found, br_hit) = get_info_entry(entry)
 
     # Return after this point in case user asked us not to generate
     # source code view
@@ -855,6 +820,12 @@ def process_file($trunc_dir, $rel_dir, $filename) -> Tuple ???:
         write_html_epilog(html_handle, Path(base_dir), True)
 
     if options.fn_coverage:
+        # Sort and demangle functions once for all function tables
+        sorted_views = funcview_get_sorted_views(funcdata, sumfnccount,
+                                                 funcview_sortlist)
+        demangle: Dict[str, str] = {}
+        if options.demangle_cpp:
+            demangle = demangle_list(sorted(funcdata.keys()))
         # Create function tables
         for sort_type in funcview_sortlist:
             write_function_page(Path($base_dir), Path($rel_dir), Path(trunc_dir),
@@ -865,7 +836,9 @@ def process_file($trunc_dir, $rel_dir, $filename) -> Tuple ???:
                                 $funcdata,   $sumcount,
                                 testfncdata, sumfnccount,
                                 testbrdata,  sumbrcount,
-                                sort_type)
+                                sort_type,
+                                sorted_funcs=sorted_views[sort_type],
+                                demangle=demangle)
 
     # Additional files are needed in case of frame output
     if not args.frames:
@@ -875,6 +848,7 @@ def process_file($trunc_dir, $rel_dir, $filename) -> Tuple ???:
                 testdata, testfncdata, testbrdata)
 
     # Create overview png file
+    from .genpng import gen_png
     gen_png("$rel_dir/$base_name.gcov.png",
             options.dark_mode, options.overview_width, options.tab_size, @source)
 
@@ -900,7 +874,9 @@ def write_function_page(base_dir: Path, rel_dir: Path, trunc_dir: Path,
                         funcdata:    Dict[str, ???], sumcount:    Dict[???, ???],
                         testfncdata: Dict[???, ???], sumfnccount: Dict[str, int],
                         testbrdata:  Dict[???, ???], sumbrcount:  Dict[???, ???],
-                        sort_type: int):
+                        sort_type: int,
+                        *, sorted_funcs: Optional[List[str]] = None,
+                        demangle: Optional[Dict[str, str]] = None):
     """ """
     global options
 
@@ -927,20 +903,33 @@ def write_function_page(base_dir: Path, rel_dir: Path, trunc_dir: Path,
                              funcdata,    sumcount,
                              testfncdata, sumfnccount,
                              testbrdata,  sumbrcount,
-                             $base_name, base_dir, sort_type)
+                             $base_name, base_dir, sort_type,
+                             sorted_funcs=sorted_funcs, demangle=demangle)
 
         write_html_epilog(html_handle, base_dir, True)
 
+# Row of the function table of a source file
+FUNCTION_ROW_HTML = """\
+        <tr>
+          <td class="coverFn"><a href="{source}#{startline}">{name}</a></td>
+          <td class="{countstyle}">{count}</td>
+        </tr>
+"""
+
 # NOK
 def write_function_table(html_handle,
-                         $source,
+                         source: str,
                          funcdata:    Dict[str, ???], sumcount:    Dict[???, ???],
                          testfncdata: Dict[???, ???], sumfnccount: Dict[str, int],
                          testbrdata:  Dict[???, ???], sumbrcount:  Dict[???, ???],
-                         $name, base_dir: Path, sort_type: int):
+                         $name, base_dir: Path, sort_type: int,
+                         *, sorted_funcs: Optional[List[str]] = None,
+                         demangle: Optional[Dict[str, str]] = None):
     # (..., source_file, base_name, ...)
     """Write an HTML table listing all functions in a source file, including
     also function call counts and line coverages inside of each function.
+    SORTED_FUNCS and DEMANGLE may pass in the function order and demangled
+    names if they were already computed for another sort type.
 
     Die on error.
     """
@@ -964,35 +953,32 @@ def write_function_table(html_handle,
 END_OF_HTML
 
     # Get demangle translation hash
-    demangle: Dict[str, str] = {}
-    if options.demangle_cpp:
-        demangle = demangle_list(sorted(funcdata.keys()))
+    if demangle is None:
+        demangle = {}
+        if options.demangle_cpp:
+            demangle = demangle_list(sorted(funcdata.keys()))
+
+    if sorted_funcs is None:
+        sorted_funcs = funcview_get_sorted(funcdata, sumfnccount, sort_type)
 
-    # Get a sorted table
-    for func in funcview_get_sorted($funcdata, sumfnccount, sort_type):
-        if ! defined($funcdata[func]): continue
+    # Get a sorted table, collecting all rows to write them out at once
+    rows: List[str] = []
+    for func in sorted_funcs:
+        if func not in funcdata: continue
 
-        startline = $funcdata[func] - func_offset
+        startline = max(funcdata[func] - func_offset, 1)
         count     = sumfnccount[func]
 
         # Replace function name with demangled version if available
-        name = func
-        if name in demangle:
-            name = demangle[name]
+        # and escape special characters
+        name = escape_html_name(demangle.get(func, func))
 
-        # Escape special characters
-        name = escape_html(name)
-
-        if startline < 1: startline = 1
         countstyle = "coverFnLo" if count == 0 else "coverFnHi"
 
-        html = (html_templates_dir/"").read_text()
-        write_html(html_handle, <<END_OF_HTML) # NOK
-        <tr>
-              <td class="coverFn"><a href="$source#{startline}">{name}</a></td>
-              <td class="{countstyle}">{count}</td>
-            </tr>
-END_OF_HTML
+        rows.append(FUNCTION_ROW_HTML.format(source=source, startline=startline,
+                                             name=name, countstyle=countstyle,
+                                             count=count))
+    write_html(html_handle, "".join(rows))
 
     html = (html_templates_dir/"").read_text()
     write_html(html_handle, <<END_OF_HTML) # NOK
@@ -1002,33 +988,192 @@ END_OF_HTML
 END_OF_HTML
 
 
-def get_converted_lines(testdata: Dict[str, Dict[???, ???]]) -> Set[int]: # NOK
+def get_converted_lines(testdata: Dict[str, Dict[int, int]]) -> Set[int]:
     """Return set of line numbers of those lines which were only covered
     in converted data sets.
     """
+    # Most tracefiles contain no converted data sets at all
+    if not any(testcase.endswith(",diff") for testcase in testdata):
+        return set()
+
     converted    = set()
     nonconverted = set()
 
     # Get a set containing line numbers with positive counts
     # both for converted and original data sets
     for testcase, testcount in testdata.items():
+        # Lines with a positive count
+        lines = {line for line, count in testcount.items() if count > 0}
         # Check to see if this is a converted data set
-        convset = converted if re.???(r",diff$", testcase) else nonconverted # NOK
-        # Add lines with a positive count to set
-        for line, count in testcount.items():
-            if count > 0:
-                convset.add(line)
-
-    result = set()
-    # Combine both sets to resulting list
-    for line in converted:
-        if line not in nonconverted:
-            result.add(line)
+        if testcase.endswith(",diff"):
+            converted |= lines
+        else:
+            nonconverted |= lines
+
+    # Combine both sets to resulting set
+    return converted - nonconverted
+
+
+# Module globals set up by main() which the jobs of worker processes
+# depend on. They are handed over to the workers explicitly, since
+# workers need not be forked from the main process: spawned workers
+# only import this module and never run main().
+WORKER_STATE = ("options", "args", "ignore", "cwd", "date", "dir_prefix",
+                "test_description", "overview_title", "demangled_names",
+                "html_templates_dir", "html_prolog", "html_epilog",
+                "fileview_sortlist", "funcview_sortlist")
+
+
+def get_worker_state() -> Dict[str, object]:
+    """Return the module globals needed by the jobs of worker processes."""
+    module_globals = globals()
+    return {name: module_globals[name] for name in WORKER_STATE
+            if name in module_globals}
+
+
+def set_worker_state(state: Dict[str, object]):
+    """Install STATE (see get_worker_state()) in a worker process."""
+    globals().update(state)
+
+
+def read_info_files(info_filenames: List[Path], jobs: int = 1,
+                    *, use_cache: bool = False) -> Dict[str, Dict[str, object]]:
+    """Read in the contents of all .info files specified by INFO_FILENAMES
+    and return the combined data. Up to JOBS files are read in parallel
+    by separate worker processes. If USE_CACHE is set, previously parsed
+    data is taken from the tracefile cache where possible.
+
+    Die on error.
+    """
+    reader = read_cached_info_file if use_cache else read_info_file
+    return combine_tracefiles(info_filenames, jobs, reader=reader,
+                              initializer=set_worker_state,
+                              initargs=(get_worker_state(),))
+
+
+def get_info_cache_dir() -> Path:
+    """Return the directory used to cache parsed tracefile data."""
+    cache_dir = os.environ.get("LCOV_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    return (Path(cache_home) if cache_home else Path.home()/".cache")/"lcov"
+
+
+def read_cached_info_file(tracefile: Path) -> Dict[str, Dict[str, object]]:
+    """Return the data of the .info file TRACEFILE as read_info_file() does,
+    but take it from the tracefile cache if the file did not change since
+    it was last parsed. Otherwise parse it and store the result in the cache.
+
+    Cache entries are keyed by the lcov version, the path, modification
+    time and size of TRACEFILE together with all settings affecting the
+    parsed data. Warnings issued while parsing are stored with the data
+    and issued again when the entry is used.
+    Entries are only loaded if they are owned by the current user and not
+    writable by others, since unpickling data may run arbitrary code, and
+    only used if they hold the expected key and data types.
+    Cache errors are never fatal: the file is simply parsed again.
+
+    Die on error.
+    """
+    global options
+    import hashlib
+    import pickle
+    import warnings
+    from .__about__ import __version__
+
+    tracefile = Path(tracefile)
+    try:
+        fstatus = tracefile.stat()
+    except OSError:
+        # Let read_info_file() report the problem
+        return read_info_file(tracefile)
+
+    key = hashlib.blake2b(f"{__version__}|{tracefile.resolve()}|"
+                          f"{fstatus.st_mtime_ns}|{fstatus.st_size}|{cwd}|"
+                          f"{bool(options.fn_coverage)}|"
+                          f"{bool(options.br_coverage)}".encode("utf-8"),
+                          digest_size=20).hexdigest()
+    cache_dir  = get_info_cache_dir()
+    cache_file = cache_dir/f"{key}.pkl"
+
+    try:
+        with cache_file.open("rb") as fhandle:
+            fstatus = os.fstat(fhandle.fileno())
+            if hasattr(os, "getuid") and (fstatus.st_uid != os.getuid() or
+                                          fstatus.st_mode & 0o022):
+                raise ValueError(f"untrusted cache entry {cache_file}")
+            entry_key, messages, result = pickle.load(fhandle)
+        if (entry_key != key or not isinstance(result, dict) or
+            not isinstance(messages, list) or
+            not all(isinstance(message, str) and isinstance(category, type) and
+                    issubclass(category, Warning)
+                    for message, category in messages)):
+            raise ValueError(f"invalid cache entry {cache_file}")
+    except Exception:
+        pass
+    else:
+        info(f"Reading data file {tracefile} (cached)")
+        for message, category in messages:
+            warnings.warn(message, category)
+        try:
+            os.utime(cache_file)  # Mark as recently used
+        except OSError:
+            pass
+        return result
+
+    # Record the warnings of the parser to store them with its result
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = read_info_file(tracefile)
+    messages = [(str(item.message), item.category) for item in caught]
+    for message, category in messages:
+        warnings.warn(message, category)
+
+    # Write to a temporary file first so that concurrent
+    # readers never see a partially written entry
+    temp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with temp_file.open("wb") as fhandle:
+            pickle.dump((key, messages, result), fhandle,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+        trim_info_cache(cache_dir)
+    except Exception:
+        pass
+    finally:
+        try:
+            temp_file.unlink()
+        except OSError:
+            pass
 
     return result
 
-# NOK
-def read_info_file($tracefile: Path) -> Dict[str, Dict[str, object]]:
+
+def trim_info_cache(cache_dir: Path, max_size: int = INFO_CACHE_MAX_SIZE):
+    """Remove least recently used entries from the tracefile cache in
+    CACHE_DIR until its total size does not exceed MAX_SIZE bytes."""
+    entries = []
+    for cache_file in cache_dir.glob("*.pkl"):
+        try:
+            fstatus = cache_file.stat()
+        except OSError:
+            continue
+        entries.append((fstatus.st_mtime, fstatus.st_size, cache_file))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, cache_file in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            cache_file.unlink()
+        except OSError:
+            continue
+        total_size -= size
+
+
+def read_info_file(tracefile: Path) -> Dict[str, Dict[str, object]]:
     """
     read_info_file(info_filename)
 
@@ -1070,34 +1215,18 @@ def read_info_file($tracefile: Path) -> Dict[str, Dict[str, object]]:
     will automatically be combined by adding all execution counts.
 
     Note that if INFO_FILENAME ends with ".gz", it is assumed that the file
-    is compressed using GZIP. If available, GUNZIP will be used to decompress
-    this file.
+    is compressed using GZIP.
+
+    Records are parsed with plain string splitting (no regular expressions)
+    since this loop runs once for every line of every tracefile.
 
     Die on error.
     """
     global options
 
-    my %result;            # Resulting hash: file -> data
-
-    my $data;            # Data handle for current entry
-    my $testcount;            #       "             "
-    my $sumcount;            #       "             "
-    my $funcdata;            #       "             "
-    my $checkdata;            #       "             "
-    my $testfncdata;
-    my $testfnccount;
-    my $sumfnccount;
-    my $testbrdata;
-    my $testbrcount;
-    my $sumbrcount;
-    my $line;            # Current line read from .info file
-    my $filename;            # Current filename
-    my $count;            # Execution count of current line
-    my $negative;            # If set, warn about negative counts
-    my $changed_testname;        # If set, warn about changed testname
-    my $line_checksum;        # Checksum of current line
+    result: Dict[str, Dict[str, object]] = {}  # Resulting dict: file -> data
 
-    notified_about_relative_paths = False
+    tracefile = Path(tracefile)
 
     info(f"Reading data file {tracefile}")
 
@@ -1105,200 +1234,188 @@ def read_info_file($tracefile: Path) -> Dict[str, Dict[str, object]]:
     if not os.access(tracefile, os.R_OK):
         die(f"ERROR: cannot read file {tracefile}!")
     # Check if this is really a plain file
-    fstatus = Path(tracefile).stat()
-    if ! (-f _):
+    if not tracefile.is_file():
         die(f"ERROR: not a plain file: {tracefile}!")
 
-    # Check for .gz extension
-    if $tracefile =~ /\.gz$/:
-        # Check for availability of GZIP tool
-        if system_no_output(1, "gunzip" ,"-h")[0] != NO_ERROR:
-            die("ERROR: gunzip command not available!")
-
-        # Check integrity of compressed file
-        if system_no_output(1, "gunzip", "-t", str(tracefile))[0] != NO_ERROR:
+    # Read in all lines, decompressing if needed
+    if tracefile.suffix == ".gz":
+        import gzip
+        try:
+            with gzip.open(tracefile, "rt") as fhandle:
+                lines = fhandle.read().splitlines()
+        except (OSError, EOFError):
             die(f"ERROR: integrity check failed for compressed file {tracefile}!")
-
-        # Open compressed file
-        INFO_HANDLE = open("-|", f"gunzip -c '{tracefile}'")
-            or die(f"ERROR: cannot start gunzip to decompress file {tracefile}!")
     else:
-        # Open decompressed file
         try:
-            INFO_HANDLE = Path(tracefile).open("rt")
+            with tracefile.open("rt") as fhandle:
+                lines = fhandle.read().splitlines()
         except:
-            or die(f"ERROR: cannot read file {tracefile}!")
+            die(f"ERROR: cannot read file {tracefile}!")
+
+    fn_coverage = options.fn_coverage
+    br_coverage = options.br_coverage
+
+    negative         = False  # If set, warn about negative counts
+    changed_testname = False  # If set, warn about changed testname
+    orphaned         = False  # If set, warn about records before any SF:
+    notified_about_relative_paths = False
 
     testname = ""  # Current test name
-    with INFO_HANDLE:
-        while (<INFO_HANDLE>)
-        {
-            line = $_.rstrip("\n")
-
-            # Switch statement
-            foreach ($line)
-            {
-                /^TN:([^,]*)(,diff)?/ && do
-                {
-                    # Test name information found
-                    testname = defined($1) ? $1 : "";
-                    if testname =~ s/\W/_/g:
-                    {
-                        $changed_testname = 1;
-                    }
-                    if (defined($2)):
-                        testname += $2
-
-                    last;
-                };
-
-                /^[SK]F:(.*)/ && do
-                {
-                    # Filename information found
-                    # Retrieve data for new entry
-                    $filename = File::Spec->rel2abs($1, str(cwd))
-
-                    if (!File::Spec->file_name_is_absolute($1) and
-                        not notified_about_relative_paths):
-                        info(f"Resolved relative source file path \"$1\" with CWD to \"$filename\".")
-                        notified_about_relative_paths = True
-
-                    $data = $result[filename]
-
-                    (testdata, $sumcount, $funcdata, $checkdata,
-                     testfncdata, $sumfnccount,
-                     $testbrdata, $sumbrcount,
-                     _, _, _, _, _, _) = get_info_entry($data)
-
-                    if defined($testname):
-                        testcount    = testdata[testname]
-                        testfnccount = testfncdata[testname]
-                        testbrcount  = $testbrdata[testname]
-                    else:
-                        testcount    = {}
-                        testfnccount = {}
-                        testbrcount  = {}
-
-                    last;
-                };
-
-                /^DA:(\d+),(-?\d+)(,[^,\s]+)?/ && do
-                {
-                    # Fix negative counts
-                    $count = $2 < 0 ? 0 : $2;
-                    if ($2 < 0)
-                    {
-                        $negative = 1;
-                    }
-                    # Execution count found, add to structure
-                    # Add summary counts
-                    $sumcount->{$1} += $count;
-
-                    # Add test-specific counts
-                    if (defined($testname))
-                    {
-                        $testcount->{$1} += $count;
-                    }
-
-                    # Store line checksum if available
-                    if (defined($3))
-                    {
-                        $line_checksum = substr($3, 1);
-
-                        # Does it match a previous definition
-                        if (defined($checkdata->{$1}) and
-                            ($checkdata->{$1} != $line_checksum)):
-                            die(f"ERROR: checksum mismatch at $filename:$1")
-
-                        $checkdata->{$1} = $line_checksum;
-                    }
-
-                    last;
-                };
-
-                /^FN:(\d+),([^,]+)/ && do
-                {
-                    if not options.fn_coverage: last
-
-                    # Function data found, add to structure
-                    $funcdata->{$2} = $1;
-
-                    # Also initialize function call data
-                    if (!defined($sumfnccount->{$2})) {
-                        $sumfnccount->{$2} = 0;
-                    }
-                    if (defined($testname))
-                    {
-                        if (!defined($testfnccount->{$2})) {
-                            $testfnccount->{$2} = 0;
-                        }
-                    }
-
-                    last;
-                };
-
-                /^FNDA:(\d+),([^,]+)/ && do
-                {
-                    if not options.fn_coverage: last
-                    # Function call count found, add to structure
-                    # Add summary counts
-                    $sumfnccount->{$2} += $1;
-
-                    # Add test-specific counts
-                    if (defined($testname))
-                    {
-                        $testfnccount->{$2} += $1;
-                    }
-
-                    last;
-                };
-
-                /^BRDA:(\d+),(\d+),(\d+),(\d+|-)/ && do {
-                    # Branch coverage data found
-                    my ($line, $block, $branch, $taken) = ($1, $2, $3, $4)
-
-                    if options.br_coverage:
-                        if $block == UNNAMED_BLOCK_MARKER: $block = -1
-                        $sumbrcount->{$line} .= "$block,$branch,$taken:"
-
-                        # Add test-specific counts
-                        if defined($testname):
-                            $testbrcount->{$line} .= "$block,$branch,$taken:"
-
-                    last;
-                };
-
-                /^end_of_record/ && do
-                {
-                    # Found end of section marker
-                    if $filename:
-                        # Store current section data
-                        if defined($testname):
-                            testdata[testname]    = $testcount;
-                            testfncdata[testname] = $testfnccount;
-                            testbrdata[testname]  = $testbrcount;
-
-                        set_info_entry($data,
-                                       $testdata, $sumcount, $funcdata, $checkdata,
-                                       testfncdata, $sumfnccount,
-                                       $testbrdata, $sumbrcount)
-                        $result[filename] = $data
-
-                        last;
-                };
-
-                # default
-                last;
-            }
-        }
+    filename = None  # Current filename
+    data = testcount = testfnccount = testbrcount = None
+    testdata = sumcount = funcdata = checkdata = None
+    testfncdata = sumfnccount = testbrdata = sumbrcount = None
+
+    for line in lines:
+        # Records are ordered by expected frequency
+        tag, sep, value = line.partition(":")
+
+        if not sep:
+            if not line.startswith("end_of_record"):
+                continue
+            # Found end of section marker
+            if filename:
+                # Store current section data
+                testdata[testname]    = testcount
+                testfncdata[testname] = testfnccount
+                testbrdata[testname]  = testbrcount
+
+                set_info_entry(data,
+                               testdata,    sumcount, funcdata, checkdata,
+                               testfncdata, sumfnccount,
+                               testbrdata,  sumbrcount)
+                result[filename] = data
+
+        elif tag == "DA":
+            # Execution count found, add to structure
+            if filename is None:
+                orphaned = True
+                continue
+            fields = value.split(",")
+            try:
+                line_no = int(fields[0])
+                count   = int(fields[1])
+            except (ValueError, IndexError):
+                continue
+            # Fix negative counts
+            if count < 0:
+                count = 0
+                negative = True
+            # Add summary counts
+            sumcount[line_no]  += count
+            # Add test-specific counts
+            testcount[line_no] += count
+
+            # Store line checksum if available
+            if len(fields) > 2 and fields[2] and not fields[2].isspace():
+                line_checksum = fields[2].split()[0]
+                # Does it match a previous definition
+                if checkdata.get(line_no, line_checksum) != line_checksum:
+                    die(f"ERROR: checksum mismatch at {filename}:{line_no}")
+                checkdata[line_no] = line_checksum
+
+        elif tag == "BRDA":
+            # Branch coverage data found
+            if not br_coverage:
+                continue
+            if filename is None:
+                orphaned = True
+                continue
+            fields = value.split(",")
+            try:
+                line_no = int(fields[0])
+                block   = int(fields[1])
+                branch  = int(fields[2])
+                taken   = fields[3]
+            except (ValueError, IndexError):
+                continue
+            if taken != "-" and not taken.isdigit():
+                continue
+            if block == UNNAMED_BLOCK_MARKER: block = -1
+            brentry = f"{block},{branch},{taken}:"
+            # Entries are joined once the whole file has been read
+            sumbrcount[line_no].append(brentry)
+            # Add test-specific counts
+            testbrcount[line_no].append(brentry)
+
+        elif tag == "FNDA":
+            # Function call count found, add to structure
+            if not fn_coverage:
+                continue
+            if filename is None:
+                orphaned = True
+                continue
+            fields = value.split(",")
+            try:
+                count = int(fields[0])
+                fn    = fields[1]
+            except (ValueError, IndexError):
+                continue
+            if not fn:
+                continue
+            # Add summary counts
+            sumfnccount[fn]  += count
+            # Add test-specific counts
+            testfnccount[fn] += count
+
+        elif tag == "FN":
+            # Function data found, add to structure
+            if not fn_coverage:
+                continue
+            if filename is None:
+                orphaned = True
+                continue
+            fields = value.split(",")
+            try:
+                line_no = int(fields[0])
+                fn      = fields[1]
+            except (ValueError, IndexError):
+                continue
+            if not fn:
+                continue
+            funcdata[fn] = line_no
+            # Also initialize function call data
+            sumfnccount.setdefault(fn, 0)
+            testfnccount.setdefault(fn, 0)
+
+        elif tag == "SF" or tag == "KF":
+            # Filename information found
+            # Retrieve data for new entry
+            filename = str(cwd/value)
+            if not Path(value).is_absolute() and not notified_about_relative_paths:
+                info(f"Resolved relative source file path \"{value}\" "
+                     f"with CWD to \"{filename}\".")
+                notified_about_relative_paths = True
+
+            data = result.get(filename, {})
+            (testdata,    sumcount,    funcdata,   checkdata,
+             testfncdata, sumfnccount,
+             testbrdata,  sumbrcount) = (item if item is not None else {}
+                                         for item in get_info_entry(data)[:8])
+            # Counts are accumulated without initializing them first
+            if not sumcount:    sumcount    = defaultdict(int)
+            if not sumfnccount: sumfnccount = defaultdict(int)
+            if not sumbrcount:  sumbrcount  = defaultdict(list)
+
+            testcount    = testdata.get(testname) or defaultdict(int)
+            testfnccount = testfncdata.get(testname) or defaultdict(int)
+            testbrcount  = testbrdata.get(testname) or defaultdict(list)
+
+        elif tag == "TN":
+            # Test name information found
+            name, _, diff = value.partition(",")
+            testname, changed = sanitize_testname(name)
+            changed_testname |= changed
+            if diff.startswith("diff"):
+                testname += ",diff"
 
     # Calculate hit and found values for lines and functions of each file
     for filename in list(result.keys()):
         data = result[filename]
 
-        (testdata,   sumcount, _, _,
+        (testdata,    sumcount, _, _,
          testfncdata, sumfnccount,
-         $testbrdata, sumbrcount,
+         testbrdata,  sumbrcount,
          _, _, _, _, _, _) = get_info_entry(data)
 
         # Filter out empty files
@@ -1306,42 +1423,45 @@ def read_info_file($tracefile: Path) -> Dict[str, Dict[str, object]]:
             del result[filename]
             continue
 
+        # Join the collected branch entries into brcount strings
+        for brcount in (sumbrcount, *testbrdata.values()):
+            for line_no, brentries in brcount.items():
+                brcount[line_no] = "".join(brentries)
+
+        # Missing keys are no longer filled in with zero counts
+        for counts in (sumcount, sumfnccount, sumbrcount,
+                       *testdata.values(), *testfncdata.values(),
+                       *testbrdata.values()):
+            counts.default_factory = None
+
         # Filter out empty test cases
-        for testname in list(keys(%{testdata})):
-            if (!defined(testdata[testname]) or
-                len(%{testdata[testname]}) == 0):
-                delete (testdata[testname])
-                delete (testfncdata[testname])
-
-        data["found"] = len(sumcount)
-        hitcount = 0
-        for $_ in (keys(%{sumcount})):
-            if sumcount->{$_} > 0:
-                hitcount += 1
-        data["hit"] = hitcount
+        for testname in list(testdata.keys()):
+            if not testdata[testname]:
+                del testdata[testname]
+                testfncdata.pop(testname, None)
+
+        data["found"],   data["hit"]   = get_line_found_and_hit(sumcount)
 
         # Get found/hit values for function call data
-        data["f_found"] = len(sumfnccount)
-        hitcount = 0
-        for $_ in (keys(%{sumfnccount})):
-            if sumfnccount->{$_} > 0:
-                hitcount += 1
-        data["f_hit"] = hitcount
+        data["f_found"], data["f_hit"] = get_func_found_and_hit(sumfnccount)
 
         # Combine branch data for the same branches
         _, data["b_found"], data["b_hit"] = compress_brcount(sumbrcount)
-        for brcount in $testbrdata.values():
+        for brcount in testbrdata.values():
             compress_brcount(brcount)
 
-    if no result:
+    if not result:
         die(f"ERROR: no valid records found in tracefile {tracefile}")
-    if $negative:
+    if negative:
         warn(f"WARNING: negative counts found in tracefile {tracefile}")
-    if $changed_testname:
+    if changed_testname:
         warn("WARNING: invalid characters removed from testname in "
              f"tracefile {tracefile}")
+    if orphaned:
+        warn("WARNING: ignoring coverage records without preceding SF: "
+             f"record in tracefile {tracefile}")
 
-    return %result
+    return result
 
 
 def get_prefix(min_dir: int, filename_list: List[str]) -> Optional[str]:
@@ -1350,49 +1470,34 @@ def get_prefix(min_dir: int, filename_list: List[str]) -> Optional[str]:
     sum of the lengths of all resulting shortened filenames while observing
     that no filename has less than min_dir parent directories.
     """
-    prefix = {}  # mapping: prefix -> sum of lengths
+    prefix: Dict[str, int] = {}  # mapping: prefix -> number of matching filenames
 
-    # Find list of prefixes
-    for current in filename_list:
-        while True:
+    # Find list of prefixes and count the filenames below each of them
+    for filename in filename_list:
+        current = shorten_prefix(filename)
+        while current:
+            pkey = current + "/"
+            prefix[pkey] = prefix.get(pkey, 0) + 1
             current = shorten_prefix(current)
-            if not current: break
-            current += "/"
-            # Skip rest if the remaining prefix has already been
-            # added to hash
-            if current in prefix: break
-            # Initialize with 0
-            prefix[current] = "0"
 
     # Remove all prefixes that would cause filenames to have less than
     # the minimum number of parent directories
     for filename in filename_list:
-        dir = dirname($filename) # NOK
+        dir = shorten_prefix(filename)
         for _ in range(min_dir):
-            del ($prefix{f"{dir}/"}) # NOK
+            prefix.pop(f"{dir}/", None)
             dir = shorten_prefix(dir)
 
     # Check if any prefix remains
     if not prefix:
         return None
 
-    # Calculate sum of lengths for all prefixes
-    for current in prefix.keys():
-        for filename in filename_list:
-            # Add original length
-            prefix[current] += len(filename)
-            # Check whether prefix matches
-            if filename[:len(current) == current:
-                # Subtract prefix length for this filename
-                prefix[current] -= len(current)
-
-    # Find and return prefix with minimal sum
-    current = prefix.keys()[0]
-    for pkey, pval in prefix.items():
-        if pval < prefix[current]:
-            current = pkey
+    # Removing a prefix shortens each matching filename by its length, so
+    # the sum of lengths is minimal for the prefix removing most characters
+    current = max(prefix, key=lambda pkey: len(pkey) * prefix[pkey])
 
-    $current =~ s/\/$// # NOK
+    if current.endswith("/"):
+        current = current[:-1]
 
     return current
 
@@ -1404,28 +1509,43 @@ def shorten_prefix(prefix: str, sep: str = "/") -> str:
     return sep.join(list)
 
 
-def get_dir_list(filename_list: List[str]) -> List[str]:
-    """Return sorted list of directories for each entry in given
-    filename_list."""
-    result = set()
+def get_dir_index(filename_list: List[str]) -> Dict[str, List[str]]:
+    """Return a dict mapping the directory of each entry in given
+    filename_list to the list of entries located in that directory
+    (not including sub-directories)."""
+    result: Dict[str, List[str]] = {}
     for fname in filename_list:
-        result.add(shorten_prefix(fname))
-    return sorted(result)
+        result.setdefault(shorten_prefix(fname), []).append(fname)
+    return result
 
 
+@lru_cache(maxsize=None)
 def get_relative_base_path(subdir: str) -> str:
     """Return a relative path string which references the base path
     when applied in subdir.
 
     Example: get_relative_base_path("fs/mm") -> "../../"
     """
-    result = ""
     # Make an empty directory path a special case
-    if subdir:
-        # Add a ../ to result for each / in the directory path + 1
-        for _ in range(subdir.count("/") + 1):
-            result += "../"
-    return result
+    if not subdir:
+        return ""
+    # Add a ../ to result for each / in the directory path + 1
+    return "../" * (subdir.count("/") + 1)
+
+
+_RE_NON_WORD  = re.compile(r"\W")
+_RE_TEST_NAME = re.compile(r"TN:\s+(.*?)\s*$")
+_RE_TEST_DESC = re.compile(r"TD:\s+(.*?)\s*$")
+
+
+@lru_cache(maxsize=4096)
+def sanitize_testname(name: str) -> Tuple[str, bool]:
+    """Return NAME with all non-word characters replaced by underscores,
+    and whether any character was replaced. Tracefiles repeat the same
+    few test names over and over, so results are cached.
+    """
+    testname, count = _RE_NON_WORD.subn("_", name)
+    return (testname, count > 0)
 
 
 def read_testfile(test_filename: Path) -> Dict[str, str]:
@@ -1455,16 +1575,15 @@ def read_testfile(test_filename: Path) -> Dict[str, str]:
             line = line.rstrip("\n")
 
             # Match lines beginning with TN:<whitespace(s)>
-            match = re.match(r"^TN:\s+(.*?)\s*$", line)
+            match = _RE_TEST_NAME.match(line)
             if match:
                 # Store test name for later use
-                test_name = match.group(1)
-                if (test_name =~ s/\W/_/g): # NOK
-                    changed_testname = True
+                test_name, changed = sanitize_testname(match.group(1))
+                changed_testname |= changed
                 continue
 
             # Match lines beginning with TD:<whitespace(s)>
-            match = re.match(r"^TD:\s+(.*?)\s*$", line)
+            match = _RE_TEST_DESC.match(line)
             if match:
                 if test_name is None:
                     die("ERROR: Found test description without prior "
@@ -1487,6 +1606,17 @@ def read_testfile(test_filename: Path) -> Dict[str, str]:
     return result
 
 
+# HTML special characters and their escapes
+_HTML_ESCAPES = str.maketrans({
+    "&":  "&amp;",
+    "<":  "&lt;",
+    ">":  "&gt;",
+    "\"": "&quot;",
+})
+# Characters which escape_html() has to replace or expand
+_RE_HTML_SPECIAL = re.compile(r'[&<>"\t\n]')
+
+
 def escape_html(string: str):
     """Return a copy of STRING in which all occurrences of HTML
     special characters are escaped.
@@ -1495,21 +1625,27 @@ def escape_html(string: str):
 
     if not string:
         return ""
+    # Most source lines need no escaping at all
+    if not _RE_HTML_SPECIAL.search(string):
+        return string
 
-    string = string.replace("&",  "&amp")   # & -> &amp;
-    string = string.replace("<",  "&lt")    # < -> &lt;
-    string = string.replace(">",  "&gt")    # > -> &gt;
-    string = string.replace("\"", "&quot")  # " -> &quot;
+    # Escape special characters, then expand tabs of the escaped text
+    string = string.translate(_HTML_ESCAPES).expandtabs(options.tab_size)
 
-    while ($string =~ /^([^\t]*)(\t)/): # NOK
-        $replacement = " " * (options.tab_size - (len($1) % options.tab_size)) # NOK
-        $string =~ s/^([^\t]*)(\t)/$1$replacement/ # NOK
-
-    string = string.replace("\n",  "<br>")  # \n -> <br>
+    string = string.replace("\n", "<br>")  # \n -> <br>
 
     return string
 
 
+@lru_cache(maxsize=1024)
+def escape_html_name(name: str):
+    """Return escape_html(NAME) for a file, directory, function or test
+    name. Such names are escaped again for every page and sort order
+    they appear in, so results are cached.
+    """
+    return escape_html(name)
+
+
 def write_description_file(descriptions: Dict[???, ???],
                            ln_found: int, ln_hit: int,
                            fn_found: int, fn_hit: int,
@@ -1549,222 +1685,248 @@ def write_description_file(descriptions: Dict[???, ???],
         write_html_epilog(html_handle, Path(""))
 
 
+# Image shared by the light and dark HTML output
+GLASS_PNG = (
+    b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+    b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+    b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+    b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+    b"\x45\xff\xff\xff\x00\x00\x00\x55\xc2\xd3"
+    b"\x7e\x00\x00\x00\x01\x74\x52\x4e\x53\x00"
+    b"\x40\xe6\xd8\x66\x00\x00\x00\x0a\x49\x44"
+    b"\x41\x54\x78\x01\x63\x60\x00\x00\x00\x02"
+    b"\x00\x01\x73\x75\x01\x18\x00\x00\x00\x00"
+    b"\x49\x45\x4e\x44\xae\x42\x60\x82"
+)
+
+# Images used as bar graphs and sort buttons of the HTML output
+PNG_FILES_LIGHT: Dict[str, bytes] = {
+    "ruby.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\xff\x35\x2f\x00\x00\x00\xd0\x33\x9a"
+        b"\x9d\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "amber.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\xff\xe0\x50\x00\x00\x00\xa2\x7a\xda"
+        b"\x7e\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "emerald.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\x1b\xea\x59\x0a\x0a\x0a\x0f\xba\x50"
+        b"\x83\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "snow.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\xff\xff\xff\x00\x00\x00\x55\xc2\xd3"
+        b"\x7e\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "glass.png": GLASS_PNG,
+    "updown.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x0a"
+        b"\x00\x00\x00\x0e\x08\x06\x00\x00\x00\x16"
+        b"\xa3\x8d\xab\x00\x00\x00\x3a\x49\x44\x41"
+        b"\x54\x78\xda\x63\x60\x40\x03\xff\xa1\x00"
+        b"\x5d\x9c\x11\x5d\x11\x8a\x24\x10\x60\x28"
+        b"\xc4\x66\x0a\xb2\x62\x46\x7c\x8a\x90\x15"
+        b"\x33\x12\x52\x04\x03\x4c\x0c\x03\x06\xa8"
+        b"\xef\x46\xe2\x83\x87\xa4\x00\x27\x26\x0a"
+        b"\x19\x88\x4d\x14\x00\xe9\x5c\x2f\xf5\x9d"
+        b"\xc8\x8b\xec\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+}
+
+# Images of the HTML output in dark mode
+PNG_FILES_DARK: Dict[str, bytes] = {
+    "ruby.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\x80\x1b\x18\x00\x00\x00\x39\x4a\x74"
+        b"\xf4\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "amber.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\x99\x86\x30\x00\x00\x00\x51\x83\x43"
+        b"\xd7\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "emerald.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\x00\x66\x00\x0a\x0a\x0a\xa4\xb8\xbf"
+        b"\x60\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "snow.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
+        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
+        b"\xdb\x56\xca\x00\x00\x00\x06\x50\x4c\x54"
+        b"\x45\xdd\xdd\xdd\x00\x00\x00\xae\x9c\x6c"
+        b"\x92\x00\x00\x00\x0a\x49\x44\x41\x54\x78"
+        b"\x01\x63\x60\x00\x00\x00\x02\x00\x01\x73"
+        b"\x75\x01\x18\x00\x00\x00\x00\x49\x45\x4e"
+        b"\x44\xae\x42\x60\x82"
+    ),
+    "glass.png": GLASS_PNG,
+    "updown.png": (
+        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
+        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x0a"
+        b"\x00\x00\x00\x0e\x08\x06\x00\x00\x00\x16"
+        b"\xa3\x8d\xab\x00\x00\x00\x40\x49\x44\x41"
+        b"\x54\x78\xda\x63\x60\x40\x03\x77\xef\xde"
+        b"\xfd\x0f\xc2\xe8\xe2\x8c\xe8\x8a\x90\xf9"
+        b"\xca\xca\xca\x8c\x18\x0a\xb1\x99\x82\xac"
+        b"\x98\x11\x9f\x22\x64\xc5\x8c\x84\x14\xc1"
+        b"\x00\x13\xc3\x80\x01\xea\xbb\x91\xf8\xe0"
+        b"\x21\x29\xc0\x89\x89\x42\x06\x62\x13\x05"
+        b"\x00\xe1\xd3\x2d\x91\x72\x75\x50\x98\x00"
+        b"\x00\x00\x00\x49\x45\x4e\x44\xae\x42\x60"
+        b"\x82"
+    ),
+}
+
+
+def get_png_files() -> Dict[str, bytes]:
+    """Return the .png files needed for the HTML output
+    as a dict of file name: file content.
+    """
+    global options
+
+    png_files = PNG_FILES_DARK if options.dark_mode else PNG_FILES_LIGHT
+    if not options.sort:
+        # Sort buttons are only needed for sortable tables
+        png_files = {fname: content for fname, content in png_files.items()
+                     if fname != "updown.png"}
+    return png_files
+
+
 def write_png_files():
     """Create all necessary .png files for the HTML-output
     in the current directory. .png-files are used as bar graphs.
 
     Die on error.
     """
-    global options
+    for fname, content in get_png_files().items():
+        write_png_file(fname, content)
 
-    data: Dict[str, object] = {}
-
-    if options.dark_mode:
-        data["ruby.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x06\x50\x4c\x54\x45\x80\x1b\x18\x00"
-            b"\x00\x00\x39\x4a\x74\xf4\x00\x00\x00"
-            b"\x0a\x49\x44\x41\x54\x08\xd7\x63\x60"
-            b"\x00\x00\x00\x02\x00\x01\xe2\x21\xbc"
-            b"\x33\x00\x00\x00\x00\x49\x45\x4e\x44"
-            b"\xae\x42\x60\x82"
-        )
-    else:
-        data["ruby.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x07\x74\x49\x4d\x45\x07\xd2\x07\x11"
-            b"\x0f\x18\x10\x5d\x57\x34\x6e\x00\x00"
-            b"\x00\x09\x70\x48\x59\x73\x00\x00\x0b"
-            b"\x12\x00\x00\x0b\x12\x01\xd2\xdd\x7e"
-            b"\xfc\x00\x00\x00\x04\x67\x41\x4d\x41"
-            b"\x00\x00\xb1\x8f\x0b\xfc\x61\x05\x00"
-            b"\x00\x00\x06\x50\x4c\x54\x45\xff\x35"
-            b"\x2f\x00\x00\x00\xd0\x33\x9a\x9d\x00"
-            b"\x00\x00\x0a\x49\x44\x41\x54\x78\xda"
-            b"\x63\x60\x00\x00\x00\x02\x00\x01\xe5"
-            b"\x27\xde\xfc\x00\x00\x00\x00\x49\x45"
-            b"\x4e\x44\xae\x42\x60\x82"
-        )
-
-    if options.dark_mode:
-        data["amber.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x06\x50\x4c\x54\x45\x99\x86\x30\x00"
-            b"\x00\x00\x51\x83\x43\xd7\x00\x00\x00"
-            b"\x0a\x49\x44\x41\x54\x08\xd7\x63\x60"
-            b"\x00\x00\x00\x02\x00\x01\xe2\x21\xbc"
-            b"\x33\x00\x00\x00\x00\x49\x45\x4e\x44"
-            b"\xae\x42\x60\x82"
-        )
-    else:
-        data["amber.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x07\x74\x49\x4d\x45\x07\xd2\x07\x11"
-            b"\x0f\x28\x04\x98\xcb\xd6\xe0\x00\x00"
-            b"\x00\x09\x70\x48\x59\x73\x00\x00\x0b"
-            b"\x12\x00\x00\x0b\x12\x01\xd2\xdd\x7e"
-            b"\xfc\x00\x00\x00\x04\x67\x41\x4d\x41"
-            b"\x00\x00\xb1\x8f\x0b\xfc\x61\x05\x00"
-            b"\x00\x00\x06\x50\x4c\x54\x45\xff\xe0"
-            b"\x50\x00\x00\x00\xa2\x7a\xda\x7e\x00"
-            b"\x00\x00\x0a\x49\x44\x41\x54\x78\xda"
-            b"\x63\x60\x00\x00\x00\x02\x00\x01\xe5"
-            b"\x27\xde\xfc\x00\x00\x00\x00\x49\x45"
-            b"\x4e\x44\xae\x42\x60\x82"
-        )
-
-    if options.dark_mode:
-        data["emerald.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x06\x50\x4c\x54\x45\x00\x66\x00\x0a"
-            b"\x0a\x0a\xa4\xb8\xbf\x60\x00\x00\x00"
-            b"\x0a\x49\x44\x41\x54\x08\xd7\x63\x60"
-            b"\x00\x00\x00\x02\x00\x01\xe2\x21\xbc"
-            b"\x33\x00\x00\x00\x00\x49\x45\x4e\x44"
-            b"\xae\x42\x60\x82"
-        )
-    else:
-        data["emerald.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x07\x74\x49\x4d\x45\x07\xd2\x07\x11"
-            b"\x0f\x22\x2b\xc9\xf5\x03\x33\x00\x00"
-            b"\x00\x09\x70\x48\x59\x73\x00\x00\x0b"
-            b"\x12\x00\x00\x0b\x12\x01\xd2\xdd\x7e"
-            b"\xfc\x00\x00\x00\x04\x67\x41\x4d\x41"
-            b"\x00\x00\xb1\x8f\x0b\xfc\x61\x05\x00"
-            b"\x00\x00\x06\x50\x4c\x54\x45\x1b\xea"
-            b"\x59\x0a\x0a\x0a\x0f\xba\x50\x83\x00"
-            b"\x00\x00\x0a\x49\x44\x41\x54\x78\xda"
-            b"\x63\x60\x00\x00\x00\x02\x00\x01\xe5"
-            b"\x27\xde\xfc\x00\x00\x00\x00\x49\x45"
-            b"\x4e\x44\xae\x42\x60\x82"
-        )
-
-    if options.dark_mode:
-        data["snow.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x06\x50\x4c\x54\x45\xdd\xdd\xdd\x00"
-            b"\x00\x00\xae\x9c\x6c\x92\x00\x00\x00"
-            b"\x0a\x49\x44\x41\x54\x08\xd7\x63\x60"
-            b"\x00\x00\x00\x02\x00\x01\xe2\x21\xbc"
-            b"\x33\x00\x00\x00\x00\x49\x45\x4e\x44"
-            b"\xae\x42\x60\x82"
-        )
-    else:
-        data["snow.png"] = bytearray(
-            b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-            b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-            b"\x00\x01\x00\x00\x00\x01\x01\x03\x00"
-            b"\x00\x00\x25\xdb\x56\xca\x00\x00\x00"
-            b"\x07\x74\x49\x4d\x45\x07\xd2\x07\x11"
-            b"\x0f\x1e\x1d\x75\xbc\xef\x55\x00\x00"
-            b"\x00\x09\x70\x48\x59\x73\x00\x00\x0b"
-            b"\x12\x00\x00\x0b\x12\x01\xd2\xdd\x7e"
-            b"\xfc\x00\x00\x00\x04\x67\x41\x4d\x41"
-            b"\x00\x00\xb1\x8f\x0b\xfc\x61\x05\x00"
-            b"\x00\x00\x06\x50\x4c\x54\x45\xff\xff"
-            b"\xff\x00\x00\x00\x55\xc2\xd3\x7e\x00"
-            b"\x00\x00\x0a\x49\x44\x41\x54\x78\xda"
-            b"\x63\x60\x00\x00\x00\x02\x00\x01\xe5"
-            b"\x27\xde\xfc\x00\x00\x00\x00\x49\x45"
-            b"\x4e\x44\xae\x42\x60\x82"
-        )
-
-    data["glass.png"] = bytearray(
-        b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00\x00"
-        b"\x00\x0d\x49\x48\x44\x52\x00\x00\x00\x01"
-        b"\x00\x00\x00\x01\x01\x03\x00\x00\x00\x25"
-        b"\xdb\x56\xca\x00\x00\x00\x04\x67\x41\x4d"
-        b"\x41\x00\x00\xb1\x8f\x0b\xfc\x61\x05\x00"
-        b"\x00\x00\x06\x50\x4c\x54\x45\xff\xff\xff"
-        b"\x00\x00\x00\x55\xc2\xd3\x7e\x00\x00\x00"
-        b"\x01\x74\x52\x4e\x53\x00\x40\xe6\xd8\x66"
-        b"\x00\x00\x00\x01\x62\x4b\x47\x44\x00\x88"
-        b"\x05\x1d\x48\x00\x00\x00\x09\x70\x48\x59"
-        b"\x73\x00\x00\x0b\x12\x00\x00\x0b\x12\x01"
-        b"\xd2\xdd\x7e\xfc\x00\x00\x00\x07\x74\x49"
-        b"\x4d\x45\x07\xd2\x07\x13\x0f\x08\x19\xc4"
-        b"\x40\x56\x10\x00\x00\x00\x0a\x49\x44\x41"
-        b"\x54\x78\x9c\x63\x60\x00\x00\x00\x02\x00"
-        b"\x01\x48\xaf\xa4\x71\x00\x00\x00\x00\x49"
-        b"\x45\x4e\x44\xae\x42\x60\x82"
-    )
-
-    if options.sort;
-        if options.dark_mode:
-            data["updown.png"] = bytearray(
-                b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-                b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-                b"\x00\x0a\x00\x00\x00\x0e\x08\x06\x00"
-                b"\x00\x00\x16\xa3\x8d\xab\x00\x00\x00"
-                b"\x43\x49\x44\x41\x54\x28\xcf\x63\x60"
-                b"\x40\x03\x77\xef\xde\xfd\x7f\xf7\xee"
-                b"\xdd\xff\xe8\xe2\x8c\xe8\x8a\x90\xf9"
-                b"\xca\xca\xca\x8c\x18\x0a\xb1\x99\x82"
-                b"\xac\x98\x11\x9f\x22\x64\xc5\x8c\x84"
-                b"\x14\xc1\x00\x13\xc3\x80\x01\xea\xbb"
-                b"\x91\xf8\xe0\x21\x29\xc0\x89\x89\x42"
-                b"\x06\x62\x13\x05\x00\xe1\xd3\x2d\x91"
-                b"\x93\x15\xa4\xb2\x00\x00\x00\x00\x49"
-                b"\x45\x4e\x44\xae\x42\x60\x82"
-            )
-        else:
-            data["updown.png"] = bytearray(
-                b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a\x00"
-                b"\x00\x00\x0d\x49\x48\x44\x52\x00\x00"
-                b"\x00\x0a\x00\x00\x00\x0e\x08\x06\x00"
-                b"\x00\x00\x16\xa3\x8d\xab\x00\x00\x00"
-                b"\x3c\x49\x44\x41\x54\x28\xcf\x63\x60"
-                b"\x40\x03\xff\xa1\x00\x5d\x9c\x11\x5d"
-                b"\x11\x8a\x24\x23\x23\x23\x86\x42\x6c"
-                b"\xa6\x20\x2b\x66\xc4\xa7\x08\x59\x31"
-                b"\x23\x21\x45\x30\xc0\xc4\x30\x60\x80"
-                b"\xfa\x6e\x24\x3e\x78\x48\x0a\x70\x62"
-                b"\xa2\x90\x81\xd8\x44\x01\x00\xe9\x5c"
-                b"\x2f\xf5\xe2\x9d\x0f\xf9\x00\x00\x00"
-                b"\x00\x49\x45\x4e\x44\xae\x42\x60\x82"
-            )
-
-    for fname, content in data.items():
+
+def write_png_file(filename: str, content: bytes):
+    """Write a single .png file FILENAME to the current directory.
+
+    Die on error.
+    """
+    # The images are tiny, so write them unbuffered, usually in a single
+    # syscall; os.write() may still write less than requested
+    try:
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC |
+                               getattr(os, "O_BINARY", 0), 0o644)
         try:
-            fhandle = Path(fname).open("wb")
-        except:
-            die(f"ERROR: cannot create {fname}!")
-        with fhandle:
-            fhandle.write(content)
+            data = memoryview(content)
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+    except OSError:
+        die(f"ERROR: cannot create {filename}!")
 
 
 def write_htaccess_file():
-    """ """
+    """Write the .htaccess file which declares the gzip encoding
+    of the .html files (only needed with options.html_gzip).
+
+    Die on error.
+    """
     global html_templates_dir
+    import shutil
+    # Copy the template as is, there is nothing to fill in
     try:
-        fhandle = Path(".htaccess").open("wt")
+        shutil.copyfile(html_templates_dir/".htaccess", ".htaccess")
     except:
         die("ERROR: cannot open .htaccess for writing!")
-    htaccess = (html_templates_dir/".htaccess").read_text()
-    with fhandle
-        print(htaccess, end="", file=fhandle)
+
+
+# Colors of the style sheet, filled in for the COLOR_NN placeholders
+CSS_PALETTE_LIGHT: Dict[str, str] = {
+    "COLOR_00": "000000",
+    "COLOR_01": "00cb40",
+    "COLOR_02": "284fa8",
+    "COLOR_03": "6688d4",
+    "COLOR_04": "a7fc9d",
+    "COLOR_05": "b5f7af",
+    "COLOR_06": "b8d0ff",
+    "COLOR_07": "cad7fe",
+    "COLOR_08": "dae7fe",
+    "COLOR_09": "efe383",
+    "COLOR_10": "ff0000",
+    "COLOR_11": "ff0040",
+    "COLOR_12": "ff6230",
+    "COLOR_13": "ffea20",
+    "COLOR_14": "ffffff",
+    "COLOR_15": "284fa8",
+    "COLOR_16": "ffffff",
+}
+CSS_PALETTE_DARK: Dict[str, str] = {
+    "COLOR_00": "e4e4e4",
+    "COLOR_01": "58a6ff",
+    "COLOR_02": "8b949e",
+    "COLOR_03": "3b4c71",
+    "COLOR_04": "006600",
+    "COLOR_05": "4b6648",
+    "COLOR_06": "495366",
+    "COLOR_07": "143e4f",
+    "COLOR_08": "1c1e23",
+    "COLOR_09": "202020",
+    "COLOR_10": "801b18",
+    "COLOR_11": "66001a",
+    "COLOR_12": "772d16",
+    "COLOR_13": "796a25",
+    "COLOR_14": "000000",
+    "COLOR_15": "58a6ff",
+    "COLOR_16": "eeeeee",
+}
+
+_RE_CSS_COLOR = re.compile(r"COLOR_\d\d")
 
 
 def write_css_file():
@@ -1777,78 +1939,49 @@ def write_css_file():
     # Check for a specified external style sheet file
     if options.css_filename is not None:
         # Simply copy that file
+        import shutil
         try:
-            shutil.copy2(str(options.css_filename), "gcov.css")
+            shutil.copy2(options.css_filename, "gcov.css")
         except:
-            die(f"ERROR: cannot copy file {css_filename}!")
+            die(f"ERROR: cannot copy file {options.css_filename}!")
         return
 
-    css_data = (html_templates_dir/"genhtml.css").read_text(encoding="utf-8")
-    # Remove leading tab from all lines
-    css_data =~ s/^\t//gm;, css_data) # NOK
-
-    if options.dark_mode:
-        palette = {
-            "COLOR_00": "e4e4e4",
-            "COLOR_01": "58a6ff",
-            "COLOR_02": "8b949e",
-            "COLOR_03": "3b4c71",
-            "COLOR_04": "006600",
-            "COLOR_05": "4b6648",
-            "COLOR_06": "495366",
-            "COLOR_07": "143e4f",
-            "COLOR_08": "1c1e23",
-            "COLOR_09": "202020",
-            "COLOR_10": "801b18",
-            "COLOR_11": "66001a",
-            "COLOR_12": "772d16",
-            "COLOR_13": "796a25",
-            "COLOR_14": "000000",
-            "COLOR_15": "58a6ff",
-            "COLOR_16": "eeeeee",
-        }
-    else:
-        palette = {
-            "COLOR_00": "000000",
-            "COLOR_01": "00cb40",
-            "COLOR_02": "284fa8",
-            "COLOR_03": "6688d4",
-            "COLOR_04": "a7fc9d",
-            "COLOR_05": "b5f7af",
-            "COLOR_06": "b8d0ff",
-            "COLOR_07": "cad7fe",
-            "COLOR_08": "dae7fe",
-            "COLOR_09": "efe383",
-            "COLOR_10": "ff0000",
-            "COLOR_11": "ff0040",
-            "COLOR_12": "ff6230",
-            "COLOR_13": "ffea20",
-            "COLOR_14": "ffffff",
-            "COLOR_15": "284fa8",
-            "COLOR_16": "ffffff",
-        }
-    # Apply palette
-    for key, val in palette.items():
-        css_data = re.sub(rf"{key}", rf"{val}"gm, css_data) # NOK
+    css_data = get_css_data(html_templates_dir, bool(options.dark_mode))
 
     try:
-        fhandle = Path("gcov.css").open("wt")
+        fhandle = Path("gcov.css").open("wb")
     except:
         die("ERROR: cannot open gcov.css for writing!")
     with fhandle:
-        print(css_data, end="", file=fhandle)
+        fhandle.write(css_data)
+
+
+@lru_cache(maxsize=None)
+def get_css_data(templates_dir: Path, dark_mode: bool) -> bytes:
+    """Return the content of gcov.css built from the genhtml.css template
+    of TEMPLATES_DIR with the light or dark palette applied.
+    """
+    css_data = (templates_dir/"genhtml.css").read_text(encoding="utf-8")
+    # Remove leading tab from all lines
+    css_data = _RE_LEADING_TAB.sub("", css_data)
+
+    palette = CSS_PALETTE_DARK if dark_mode else CSS_PALETTE_LIGHT
+
+    # Apply palette in a single pass
+    css_data = _RE_CSS_COLOR.sub(lambda match: palette[match.group()], css_data)
+
+    return css_data.encode("utf-8")
 
 
 def classify_rate(found: int, hit: int, med_limit: int, hi_limit: int) -> int:
     """Return 0 for low rate, 1 for medium rate and 2 for high rate."""
     if found == 0:
         return 2
-    rate = rate(hit, found)
-    if rate < med_limit:
-        return 0
-    elif rate < hi_limit:
-        return 1
-    return 2
+    hit_rate = float(rate(hit, found))
+    return (hit_rate >= med_limit) + (hit_rate >= hi_limit)
+
+
+_RE_LEADING_TAB = re.compile(r"^\t", re.MULTILINE)
 
 
 def write_html(html_handle, html: str):
@@ -1857,9 +1990,12 @@ def write_html(html_handle, html: str):
 
     Remove leading tab from all lines
     """
-    html = re.sub(s/^\t//gm;, "", html) # NOK
+    # Templates without tabulators, e.g. the row templates, need no
+    # substitution at all
+    if "\t" in html:
+        html = _RE_LEADING_TAB.sub("", html)
     try:
-        print(html, end="", file=html_handle)
+        html_handle.write(html)
     except Exception as exc:
         die(f"ERROR: cannot write HTML data ({exc})")
 
@@ -1874,8 +2010,8 @@ def write_html_prolog(html_handle, base_dir: Path, pagetitle: str):
     basedir = base_dir.as_posix()
 
     prolog = html_prolog
-    prolog = re.sub(rf"\@pagetitle\@", rf"{pagetitle}", prolog)
-    prolog = re.sub(rf"\@basedir\@",   rf"{basedir}",   prolog)
+    prolog = prolog.replace("@pagetitle@", pagetitle)
+    prolog = prolog.replace("@basedir@",   basedir)
 
     write_html(html_handle, prolog)
 
@@ -1885,25 +2021,31 @@ def write_html_epilog(html_handle, base_dir: Path, break_frames: bool = False):
     when this page is embedded in a frameset, clicking the url link will
     then break this frameset.
     """
+    write_html(html_handle, get_html_epilog_code(base_dir.as_posix(),
+                                                 bool(break_frames)))
+
+
+@lru_cache(maxsize=None)
+def get_html_epilog_code(basedir: str, break_frames: bool) -> str:
+    """Return the HTML page footer as written by write_html_epilog().
+    The footer only depends on the relative path to the base directory,
+    so it is built once per directory level.
+    """
     global lcov_version, lcov_url
-    global html_templates_dir
+    global html_epilog
 
-    basedir    = base_dir.as_posix()
-    break_code = ' target="_parent"' if break_frames is not None else ""
+    break_code = ' target="_parent"' if break_frames else ""
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
+    epilog = html_epilog
+    epilog = epilog.replace("@basedir@", basedir)
+
+    return f"""\
       <table width="100%" border=0 cellspacing=0 cellpadding=0>
         <tr><td class="ruler"><img src="{basedir}/glass.png" width=3 height=3 alt=""></td></tr>
         <tr><td class="versionInfo">Generated by: <a href="{lcov_url}"{break_code}>{lcov_version}</a></td></tr>
       </table>
       <br>
-END_OF_HTML
-
-    epilog = html_epilog
-    epilog = re.sub(rf"\@basedir\@", rf"{basedir}", epilog)
-
-    write_html(html_handle, epilog)
+""" + epilog
 
 
 def write_header_prolog(html_handle, base_dir):
@@ -1920,19 +2062,36 @@ def write_header_epilog(html_handle, base_dir)
     write_html(html_handle, html)
 
 
-def write_header_line(handle, content: List[???]): # NOK
+# Cell of a header table row
+HEADER_CELL_HTML = '            <td{width}{klass}{colspan}>{text}</td>\n'
+
+
+def html_attr(name: str, value) -> str:
+    """Return the HTML attribute NAME="VALUE" with a leading space,
+    or an empty string if VALUE is None.
+    """
+    return f' {name}="{value}"' if value is not None else ""
+
+
+def write_header_line(handle, content: List[Tuple]):
     """Write a header line with the specified table contents."""
-    write_html(handle, '          <tr>\n')
+    write_html(handle, format_header_line(content))
 
-    for entry in content:
-        width, klass, text, colspan = entry
-        width   = f' width="{width}"'     if width   is not None else ""
-        klass   = f' class="{klass}"'     if klass   is not None else ""
-        colspan = f' colspan="{colspan}"' if colspan is not None else ""
-        if text is None: text = ""
-        write_html(handle, f'            <td{width}{klass}{colspan}>{text}</td>\n')
 
-    write_html(handle, '          </tr>\n')
+def format_header_line(content: List[Tuple]) -> str:
+    """Return the HTML code of a header line with the specified
+    table contents. Each entry of CONTENT is a sequence of up to
+    (width, class, text, colspan), missing items default to None.
+    """
+    parts = ['          <tr>\n']
+    for entry in content:
+        width, klass, text, colspan = (*entry, None, None, None, None)[:4]
+        parts.append(HEADER_CELL_HTML.format(width=html_attr("width", width),
+                                             klass=html_attr("class", klass),
+                                             colspan=html_attr("colspan", colspan),
+                                             text="" if text is None else text))
+    parts.append('          </tr>\n')
+    return "".join(parts)
 
 
 def write_test_table_prolog(html_handle, table_heading)
@@ -1961,16 +2120,13 @@ END_OF_HTML
 
 def fmt_centered(width: int, text: str) -> str:
     """ """
-    w0 = len(text)
-    w1 = int((width - w0) / 2) if width > w0 else 0
-    w2 = width - w0 - w1       if width > w0 else 0
-
-    return " " * w1 + text + " " * w2
+    # Not str.center(): that one puts the odd padding space on the left
+    return text.rjust((width + len(text)) // 2).ljust(width)
 
 
-def get_block_len(block: List[???]) -> int: # NOK
+def get_block_len(block: List[List]) -> int:
     """Calculate total text length of all branches in a block of branches."""
-    return sum((branch[BR_LEN] for branch in block), 0)
+    return sum(map(_get_br_len, block))
 
 # NOK
 def write_frameset(html_handle, base_dir: Path, basename: str, pagetitle: str):
@@ -2005,68 +2161,74 @@ def write_frameset(html_handle, base_dir: Path, basename: str, pagetitle: str):
 END_OF_HTML
 
 # NOK
-def write_overview(html_handle, base_dir: Path, basename, pagetitle: str, lines: int   *$$$$):
+def write_overview(html_handle, base_dir: Path, basename: str, pagetitle: str, lines: int):
     """ """
     global options
-    global html_templates_dir
 
     basedir  = base_dir.as_posix()
     max_line = lines - 1
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-    <!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
+    html = [f"""\
+<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
 
-    <html lang="en">
+<html lang="en">
 
-    <head>
-      <title>{pagetitle}</title>
-      <meta http-equiv="Content-Type" content=f"text/html; charset={options.charset}">
-      <link rel="stylesheet" type="text/css" href="{basedir}/gcov.css">
-    </head>
+<head>
+  <title>{pagetitle}</title>
+  <meta http-equiv="Content-Type" content="text/html; charset={options.charset}">
+  <link rel="stylesheet" type="text/css" href="{basedir}/gcov.css">
+</head>
 
-    <body>
-      <map name="overview">
-END_OF_HTML
+<body>
+  <map name="overview">
+"""]
 
     # Make offset the next higher multiple of options.nav_resolution
-    offset = (options.nav_offset + options.nav_resolution - 1) / options.nav_resolution
-    offset = sprintf("%d", offset ) * options.nav_resolution
+    offset = -(-options.nav_offset // options.nav_resolution) * options.nav_resolution
 
     # Create image map for overview image
     for index in range(1, lines + 1, options.nav_resolution):
         # Enforce nav_offset
-        write_overview_line(html_handle, basename, index, max(1, index - offset))
+        html.append(get_overview_line(basename, index, max(1, index - offset)))
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-      </map>
+    html.append(f"""\
+  </map>
 
-      <center>
-      <a href="{basename}.gcov.{options.html_ext}#top" target="source">Top</a><br><br>
-      <img src="{basename}.gcov.png" width={options.overview_width} height={max_line} alt="Overview" border=0 usemap="#overview">
-      </center>
-    </body>
-    </html>
-END_OF_HTML
+  <center>
+  <a href="{basename}.gcov.{options.html_ext}#top" target="source">Top</a><br><br>
+  <img src="{basename}.gcov.png" width={options.overview_width} height={max_line} alt="Overview" border=0 usemap="#overview">
+  </center>
+</body>
+</html>
+""")
+
+    # Write the whole page at once
+    write_html(html_handle, "".join(html))
 
 
 def write_overview_line(html_handle, base_name: str, line: int, link_no: int):
     """ """
-    global options
-    global html_templates_dir
+    write_html(html_handle, get_overview_line(base_name, line, link_no))
 
-    x1 = 0
-    y1 = line - 1
-    x2 = options.overview_width - 1
-    y2 = y1 + options.nav_resolution - 1
-    basename = base_name
-    link = str(link_no)
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        <area shape="rect" coords="{x1},{y1},{x2},{y2}" href="{basename}.gcov.{options.html_ext}#{link}" target="source" alt="overview">
-END_OF_HTML
+# Area of the image map of an overview image
+OVERVIEW_AREA_HTML = ('    <area shape="rect" coords="{x1},{y1},{x2},{y2}"'
+                      ' href="{basename}.gcov.{html_ext}#{link}"'
+                      ' target="source" alt="overview">\n')
+
+
+def get_overview_line(base_name: str, line: int, link_no: int) -> str:
+    """Return the image map area of the overview image for LINE
+    linking to source line LINK_NO.
+    """
+    global options
+
+    return OVERVIEW_AREA_HTML.format(x1=0, y1=line - 1,
+                                     x2=options.overview_width - 1,
+                                     y2=line - 1 + options.nav_resolution - 1,
+                                     basename=base_name,
+                                     html_ext=options.html_ext,
+                                     link=link_no)
 
 # NOK
 def write_header(html_handle, header_type: int,
@@ -2093,10 +2255,8 @@ def write_header(html_handle, header_type: int,
     my $base_name;
     my $style;
     my $rate;
-    my $num_rows;
-    my $i;
 
-    esc_trunc_name = escape_html($trunc_name)
+    esc_trunc_name = escape_html_name($trunc_name)
 
     $base_name = basename($rel_filename);
 
@@ -2113,8 +2273,8 @@ def write_header(html_handle, header_type: int,
     elif header_type == HDR_SOURCE or header_type == HDR_FUNC:
         # File view
         dir_name      = dirname($rel_filename)
-        esc_base_name = escape_html($base_name)
-        esc_dir_name  = escape_html($dir_name)
+        esc_base_name = escape_html_name($base_name)
+        esc_dir_name  = escape_html_name($dir_name)
 
         $base_dir = get_relative_base_path($dir_name);
         if args.frames:
@@ -2149,7 +2309,7 @@ def write_header(html_handle, header_type: int,
                  f"{overview_title}</a> - test case descriptions")
 
     # Prepare text for "test" field
-    test = escape_html(args.test_title)
+    test = escape_html_name(args.test_title)
 
     # Append link to test description page if available
     if test_description and header_type != HDR_TESTDESC:
@@ -2212,7 +2372,7 @@ END_OF_HTML
                           ["10%", "headerCovTableHead", "Total" ],
                           ["15%", "headerCovTableHead", "Coverage"]])
     # Line coverage
-    $style = $rate_name[classify_rate($ln_found, $ln_hit,
+    $style = rate_name[classify_rate($ln_found, $ln_hit,
                                       options.med_limit, options.hi_limit)]
     $rate = rate($ln_hit, $ln_found, " %")
     if header_type != HDR_TESTDESC;
@@ -2222,7 +2382,7 @@ END_OF_HTML
                           [_, "headerCovTableEntry$style", $rate]])
     # Function coverage
     if options.fn_coverage:
-        $style = $rate_name[classify_rate($fn_found, $fn_hit,
+        $style = rate_name[classify_rate($fn_found, $fn_hit,
                                           options.fn_med_limit, options.fn_hi_limit)];
         $rate = rate($fn_hit, $fn_found, " %")
         if header_type != HDR_TESTDESC;
@@ -2232,7 +2392,7 @@ END_OF_HTML
                               [_, "headerCovTableEntry$style", $rate]])
     # Branch coverage
     if options.br_coverage:
-        $style = $rate_name[classify_rate($br_found, $br_hit,
+        $style = rate_name[classify_rate($br_found, $br_hit,
                                           options.br_med_limit, options.br_hi_limit)];
         $rate = rate($br_hit, $br_found, " %")
         if header_type != HDR_TESTDESC:
@@ -2242,19 +2402,15 @@ END_OF_HTML
                               [_, "headerCovTableEntry$style", $rate]])
 
     # Print rows
-    $num_rows = max(len(row_left), len(row_right))
-    for ($i = 0; $i < $num_rows; $i++):
-        my $left  = $row_left[$i];
-        my $right = $row_right[$i];
-        if ! defined($left):
-            $left = [[_, _, _],
-                     [_, _, _]]
-        if (!defined($right)):
-            $right = [];
-        write_header_line(html_handle,
-                          @{$left},
-                          [ $i == 0 ? "5%" : _, _, _],
-                          @{$right})
+    rows = []
+    for i in range(max(len(row_left), len(row_right))):
+        left  = row_left[i]  if i < len(row_left)  else [[None, None, None],
+                                                         [None, None, None]]
+        right = row_right[i] if i < len(row_right) else []
+        rows.append(format_header_line([*left,
+                                        ["5%" if i == 0 else None, None, None],
+                                        *right]))
+    write_html(html_handle, "".join(rows))
 
     # Fourth line
     write_header_epilog(html_handle, $base_dir)
@@ -2281,16 +2437,19 @@ def get_sort_code(sort_link: Optional[str], alt: str, base_dir: Path):
 # NOK
 def write_file_table(html_handle,
                      base_dir: Path,
-                     overview: Dict[str, List],
+                     overview: Dict[str, OverviewEntry],
                      testhash,
                      testfnchash,
                      testbrhash,
-                     fileview: bool, sort_type: int):
+                     fileview: bool, sort_type: int,
+                     *, sorted_names: Optional[List[str]] = None):
     """Write a complete file table. OVERVIEW is a reference to a hash
     containing the following mapping:
 
-      filename -> "ln_found,ln_hit,funcs_found,funcs_hit,page_link,
-                   func_link"
+      filename -> OverviewEntry
+
+    SORTED_NAMES optionally provides the keys of OVERVIEW already sorted
+    according to SORT_TYPE (see get_sorted_views()).
 
     TESTHASH is a reference to the following hash:
 
@@ -2304,8 +2463,6 @@ def write_file_table(html_handle,
     global options
     global test_description
 
-    my %affecting_tests;
-
     # Determine HTML code for column headings
     if $base_dir != "" and options.show_details:
         detailed = bool($testhash)
@@ -2340,17 +2497,20 @@ def write_file_table(html_handle,
 
     write_file_table_prolog(html_handle, file_code, head_columns)
 
-    for filename in get_sorted_keys(overview, sort_type):
+    if sorted_names is None:
+        sorted_names = get_sorted_keys(overview, sort_type)
+
+    for filename in sorted_names:
 
         testdata    = $testhash[filename]
         testfncdata = $testfnchash[filename]
         testbrdata  = $testbrhash[filename]
 
-        (ln_found, ln_hit,
-         fn_found, fn_hit,
-         br_found, br_hit,
-         page_link,
-         _, _, _) = overview[filename]
+        entry = overview[filename]
+        ln_found, ln_hit = entry.ln_found, entry.ln_hit
+        fn_found, fn_hit = entry.fn_found, entry.fn_hit
+        br_found, br_hit = entry.br_found, entry.br_hit
+        page_link = entry.link
 
         columns = []
         # Line coverage
@@ -2368,13 +2528,13 @@ def write_file_table(html_handle,
         if not testdata or not options.show_details: continue
 
         # Filter out those tests that actually affect this file
-        %affecting_tests = get_affecting_tests(testdata, testfncdata, testbrdata)
+        affecting_tests = get_affecting_tests(testdata, testfncdata, testbrdata)
 
         # Does any of the tests affect this file at all?
-        if not %affecting_tests: continue
+        if not affecting_tests: continue
 
-        for testname in keys(%affecting_tests):
-            ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit = $affecting_tests[testname].split(",")
+        for testname, counts in affecting_tests.items():
+            ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit = counts
 
             # Insert link to description of available
             if $test_description[testname]:
@@ -2390,20 +2550,38 @@ def write_file_table(html_handle,
     write_file_table_epilog(html_handle)
 
 
-def get_file_code(view_type: int, text: str, sort_button: bool, base_dir: Path):
-    """ """
+# Targets of the sort buttons of the file table headings by view type
+# (file names without the options.html_ext extension)
+FILE_SORT_LINKS = {HEAD_NO_DETAIL:     "index",
+                   HEAD_DETAIL_HIDDEN: "index-detail",
+                   HEAD_DETAIL_SHOWN:  "index-detail"}
+LINE_SORT_LINKS = {HEAD_NO_DETAIL:     "index-sort-l",
+                   HEAD_DETAIL_HIDDEN: "index-sort-l",
+                   HEAD_DETAIL_SHOWN:  "index-detail-sort-l"}
+FUNC_SORT_LINKS = {HEAD_NO_DETAIL:     "index-sort-f",
+                   HEAD_DETAIL_HIDDEN: "index-detail-sort-f",
+                   HEAD_DETAIL_SHOWN:  "index-detail-sort-f"}
+BRAN_SORT_LINKS = {HEAD_NO_DETAIL:     "index-sort-b",
+                   HEAD_DETAIL_HIDDEN: "index-detail-sort-b",
+                   HEAD_DETAIL_SHOWN:  "index-detail-sort-b"}
+# Show/hide details links of the line coverage heading by view type
+LINE_DETAIL_LINKS = {HEAD_DETAIL_HIDDEN: ("index-detail", "show details"),
+                     HEAD_DETAIL_SHOWN:  ("index",        "hide details")}
+
+
+def get_sort_link(sort_links: Dict[int, str], view_type: int,
+                  sort_button: bool) -> Optional[str]:
+    """Return the target of a sort button for VIEW_TYPE from SORT_LINKS,
+    or None if there is no sort button.
+    """
     global options
+    return f"{sort_links[view_type]}.{options.html_ext}" if sort_button else None
 
-    result = text
-    sort_link = None
-    if sort_button:
-        if view_type == HEAD_NO_DETAIL:
-            sort_link = f"index.{options.html_ext}"
-        else:
-            sort_link = f"index-detail.{options.html_ext}"
-    result += get_sort_code(sort_link, "Sort by name", base_dir)
 
-    return result
+def get_file_code(view_type: int, text: str, sort_button: bool, base_dir: Path):
+    """ """
+    sort_link = get_sort_link(FILE_SORT_LINKS, view_type, sort_button)
+    return text + get_sort_code(sort_link, "Sort by name", base_dir)
 
 
 def get_line_code(view_type: int, sort_type: int, text: str, sort_button: bool, base_dir: Path):
@@ -2412,28 +2590,15 @@ def get_line_code(view_type: int, sort_type: int, text: str, sort_button: bool,
     global fileview_sortnames
 
     result = text
-    sort_link = None
-    if view_type == HEAD_NO_DETAIL:
-        # Just text
-        if sort_button:
-            sort_link = f"index-sort-l.{options.html_ext}"
-    elif view_type == HEAD_DETAIL_HIDDEN:
-        # Text + link to detail view
+    if view_type != HEAD_NO_DETAIL:
+        # Text + link to detail or standard view
+        page, link_text = LINE_DETAIL_LINKS[view_type]
         sort_name = fileview_sortnames[sort_type]
         result += (' ( <a class="detail"'
-                   f' href="index-detail{sort_name}.{options.html_ext}">'
-                   'show details</a> )')
-        if sort_button:
-            sort_link = f"index-sort-l.{options.html_ext}"
-    else:
-        # Text + link to standard view
-        sort_name = fileview_sortnames[sort_type]
-        result += (' ( <a class="detail"'
-                   f' href="index{sort_name}.{options.html_ext}">'
-                   'hide details</a> )')
-        if sort_button:
-            sort_link = f"index-detail-sort-l.{options.html_ext}"
+                   f' href="{page}{sort_name}.{options.html_ext}">'
+                   f'{link_text}</a> )')
     # Add sort button
+    sort_link = get_sort_link(LINE_SORT_LINKS, view_type, sort_button)
     result += get_sort_code(sort_link, "Sort by line coverage", base_dir)
 
     return result
@@ -2441,91 +2606,55 @@ def get_line_code(view_type: int, sort_type: int, text: str, sort_button: bool,
 
 def get_func_code(view_type: int, text: str, sort_button: bool, base_dir: Path):
     """ """
-    global options
-
-    result = text
-    sort_link = None
-    if sort_button:
-        if view_type == HEAD_NO_DETAIL:
-            sort_link = f"index-sort-f.{options.html_ext}"
-        else:
-            sort_link = f"index-detail-sort-f.{options.html_ext}"
-    result += get_sort_code(sort_link, "Sort by function coverage", base_dir)
-
-    return result
+    sort_link = get_sort_link(FUNC_SORT_LINKS, view_type, sort_button)
+    return text + get_sort_code(sort_link, "Sort by function coverage", base_dir)
 
 
 def get_bran_code(view_type: int, text: str, sort_button: bool, base_dir: Path):
     """ """
-    global options
-
-    result = text
-    sort_link = None
-    if sort_button:
-        if view_type == HEAD_NO_DETAIL:
-            sort_link = f"index-sort-b.{options.html_ext}"
-        else:
-            sort_link = f"index-detail-sort-b.{options.html_ext}"
-    result += get_sort_code(sort_link, "Sort by branch coverage", base_dir)
-
-    return result
+    sort_link = get_sort_link(BRAN_SORT_LINKS, view_type, sort_button)
+    return text + get_sort_code(sort_link, "Sort by branch coverage", base_dir)
 
 
 def write_file_table_prolog(html_handle, file_heading: str, columns: List[Tuple[str, int]]):
     """Write heading for file table."""
-    global html_templates_dir
-
     if   len(columns) == 1: width = 20
     elif len(columns) == 2: width = 10
     elif len(columns) >  2: width = 8
     else:                   width = 0
 
-    num_columns = 0
-    for _, cols in columns:
-        num_columns += cols
+    num_columns = sum(cols for _, cols in columns)
 
     file_width = 100 - num_columns * width
 
     # Table definition
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-      <center>
-      <table width="80%" cellpadding=1 cellspacing=1 border=0>
+    html = [f"""\
+  <center>
+  <table width="80%" cellpadding=1 cellspacing=1 border=0>
 
-        <tr>
-          <td width="{file_width}%"><br></td>
-END_OF_HTML
+    <tr>
+      <td width="{file_width}%"><br></td>
+"""]
 
     # Empty first row
-    for _, cols in columns:
-        for _ in range(cols):
-            html = (html_templates_dir/"").read_text()
-            write_html(html_handle, <<END_OF_HTML) # NOK
-          <td width="{width}%"></td>
-END_OF_HTML
+    html.append(f'      <td width="{width}%"></td>\n' * num_columns)
 
     # Next row
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        </tr>
+    html.append(f"""\
+    </tr>
 
-        <tr>
-          <td class="tableHead">{file_heading}</td>
-END_OF_HTML
+    <tr>
+      <td class="tableHead">{file_heading}</td>
+""")
 
     # Heading row
     for heading, cols in columns:
         colspan = f" colspan={cols}" if cols > 1 else ""
+        html.append(f'      <td class="tableHead"{colspan}>{heading}</td>\n')
 
-        html = (html_templates_dir/"").read_text()
-        write_html(html_handle, <<END_OF_HTML) # NOK
-          <td class="tableHead"{colspan}>{heading}</td>
-END_OF_HTML
+    html.append("    </tr>\n")
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        </tr>
-END_OF_HTML
+    write_html(html_handle, "".join(html))
 
 
 def write_file_table_epilog(html_handle):
@@ -2534,159 +2663,141 @@ def write_file_table_epilog(html_handle):
     html = (html_templates_dir/"file_table_epilog.html").read_text()
     write_html(html_handle, html)
 
-# NOK
+
+# Start of a row of the file table, up to the file name
+FILE_ROW_START_HTML = """\
+    <tr>
+      <td class="coverFile">"""
+
+
 def write_file_table_entry(html_handle, base_dir: Path, filename: str,
                            page_link: Optional[str],
-                           entries: List[Tuple[???, int, int, int, bool]]):
+                           entries: List[Tuple[int, int, int, int, bool]]):
     """Write an entry of the file table."""
     global options
-    global html_templates_dir
 
-    esc_filename = escape_html(filename)
+    esc_filename = escape_html_name(filename)
     # Add link to source if provided
-    if page_link isn not None and page_link != "":
+    if page_link:
         file_code = f'<a href="{page_link}">{esc_filename}</a>'
     else:
         file_code = esc_filename
 
     # First column: filename
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        <tr>
-          <td class="coverFile">{file_code}</td>
-END_OF_HTML
+    html = [FILE_ROW_START_HTML, file_code, "</td>\n"]
 
     # Columns as defined
     for found, hit, med_limit, hi_limit, graph in entries:
 
-        # Generate bar graph if requested
-        if graph:
-            bar_graph = get_bar_graph_code(base_dir, found, hit)
-
-            html = (html_templates_dir/"").read_text()
-            write_html(html_handle, <<END_OF_HTML) # NOK
-          <td class="coverBar" align="center">
-            {bar_graph}
-          </td>
-END_OF_HTML
-
-        # Get rate color and text
+        # Get rate color and text (computed once for text and bar graph)
         if found == 0:
-            rate  = "-"
-            klass = "Hi"
+            rate_val = "-"
+            klass    = "Hi"
         else:
-            rate  = rate(hit, $found, "&nbsp;%")
-            klass = $rate_name[classify_rate($found, hit, med_limit, hi_limit)]
+            rate_text, rate_pct, rate_class = get_rate_stats(found, hit,
+                                                             med_limit, hi_limit)
+            rate_val = rate_text + "&nbsp;%"
+            klass    = rate_name[rate_class]
+
+        # Generate bar graph if requested
+        if graph:
+            bar_graph = (get_bar_graph_code(base_dir, rate_text + "%", rate_pct,
+                                            rate_png[rate_class])
+                         if found != 0 else "")
+            html.append(f"""\
+      <td class="coverBar" align="center">
+        {bar_graph}
+      </td>
+""")
 
         if options.missed:
             # Show negative number of items without coverage
             hit = -(found - hit)
 
-        html = (html_templates_dir/"").read_text()
-        write_html(html_handle, <<END_OF_HTML) # NOK
-          <td class="coverPer{klass}">{rate}</td>
-          <td class="coverNum{klass}">{hit} / {found}</td>
-END_OF_HTML
+        html.append(f"""\
+      <td class="coverPer{klass}">{rate_val}</td>
+      <td class="coverNum{klass}">{hit} / {found}</td>
+""")
 
     # End of row
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        </tr>
-END_OF_HTML
+    html.append("    </tr>\n")
+
+    write_html(html_handle, "".join(html))
 
 
 def write_file_table_detail_entry(html_handle, test_name: str,
                                   entries: List[Tuple[int, int]]):
     """Write entry for detail section in file table."""
-    global html_templates_dir
-
     if test_name == "":
         test_name = '<span style="font-style:italic">&lt;unnamed&gt;</span>'
     else:
-        match = re.match(r"^(.*),diff$")
-        if match:
-            test_name = match.group(1) + " (converted)"
+        if test_name.endswith(",diff"):
+            test_name = test_name[:-len(",diff")] + " (converted)"
 
     # Testname
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        <tr>
-          <td class="testName" colspan=2>{test_name}</td>
-END_OF_HTML
+    html = [f"""\
+    <tr>
+      <td class="testName" colspan=2>{test_name}</td>
+"""]
     # Test data
     for found, hit in entries:
         rate_val = rate(hit, found, "&nbsp;%")
-        html = (html_templates_dir/"").read_text()
-        write_html(html_handle, <<END_OF_HTML) # NOK
-          <td class="testPer">{rate_val}</td>
-          <td class="testNum">{hit}&nbsp;/&nbsp;{found}</td>
-END_OF_HTML
+        html.append(f"""\
+      <td class="testPer">{rate_val}</td>
+      <td class="testNum">{hit}&nbsp;/&nbsp;{found}</td>
+""")
 
-    html = (html_templates_dir/"").read_text()
-    write_html(html_handle, <<END_OF_HTML) # NOK
-        </tr>
+    html.append("    </tr>\n\n")
 
-END_OF_HTML
+    write_html(html_handle, "".join(html))
 
-# NOK
-def get_bar_graph_code(base_dir: Path, found, hit: int) -> str:
-    """Return a string containing HTML code which implements a bar graph
-    display for a coverage rate of cover_hit * 100 / cover_found.
+
+@lru_cache(maxsize=4096)
+def get_rate_stats(found: int, hit: int,
+                   med_limit: int, hi_limit: int) -> Tuple[str, int, int]:
+    """Return the coverage rate text, the coverage rate in whole percent
+    and the rate class (see classify_rate()) for HIT and FOUND values.
+    The same few (found, hit) pairs recur for many files, so results
+    are cached.
     """
-    global options
+    return (rate(hit, found), int(rate(hit, found, None, 0)),
+            classify_rate(found, hit, med_limit, hi_limit))
 
-    # Check number of instrumented lines
-    if found == 0:
-        return ""
 
+def get_bar_graph_code(base_dir: Path, alt: str, width: int, png_name: str) -> str:
+    """Return a string containing HTML code which implements a bar graph
+    display for a coverage rate of WIDTH percent drawn with PNG_NAME.
+    """
     basedir   = base_dir.as_posix()
-    alt       = rate(hit, found, "%")
-    width     = rate(hit, found, None, 0)
     remainder = 100 - width
-    # Decide which .png file to use
-    png_name  = $rate_png[classify_rate(found, hit,
-                                        options.med_limit, options.hi_limit)] # NOK
     if width == 0:
         # Zero coverage
-        graph_code = (<<END_OF_HTML) # NOK
-            <table border=0 cellspacing=0 cellpadding=1>
-              <tr><td class="coverBarOutline">
-                <img src="{basedir}/snow.png" width=100 height=10 alt="{alt}">
-              </td></tr>
-            </table>
-END_OF_HTML
+        images = f'<img src="{basedir}/snow.png" width=100 height=10 alt="{alt}">'
     elif width == 100:
         # Full coverage
-        graph_code = (<<END_OF_HTML) # NOK
-        <table border=0 cellspacing=0 cellpadding=1>
-          <tr><td class="coverBarOutline">
-            <img src="{basedir}/{png_name}" width=100 height=10 alt="{alt}">
-          </td></tr>
-        </table>
-END_OF_HTML
+        images = f'<img src="{basedir}/{png_name}" width=100 height=10 alt="{alt}">'
     else:
         # Positive coverage
-        graph_code = (<<END_OF_HTML) # NOK
-        <table border=0 cellspacing=0 cellpadding=1>
-          <tr><td class="coverBarOutline">
-            <img src="{basedir}/{png_name}" width={width} height=10 alt="{alt}">
-            <img src="{basedir}/snow.png" width={remainder} height=10 alt="{alt}">
-          </td></tr>
-        </table>
-END_OF_HTML
+        images = (f'<img src="{basedir}/{png_name}" width={width} height=10 alt="{alt}">\n'
+                  f'    <img src="{basedir}/snow.png" width={remainder} height=10 alt="{alt}">')
+
+    return ('<table border=0 cellspacing=0 cellpadding=1>\n'
+            '  <tr><td class="coverBarOutline">\n'
+            f'    {images}\n'
+            '  </td></tr>\n'
+            '</table>')
 
-    # Remove leading tabs from all lines
-    graph_code =~ s/^\t+//gm;, graph_code) # NOK
-    graph_code = graph_code.rstrip("\n")
 
-    return graph_code
+def get_sorted_views(dict: Dict[str, OverviewEntry], sort_types: List[int]) -> Dict[int, List[str]]:
+    """Return a dict mapping each of SORT_TYPES to the keys of DICT sorted
+    accordingly, so that every sort order is computed only once."""
+    return {sort_type: get_sorted_keys(dict, sort_type)
+            for sort_type in sort_types}
 
 
-def get_sorted_keys(dict: Dict[str, List], sort_type: int) -> List[str]:
+def get_sorted_keys(dict: Dict[str, OverviewEntry], sort_type: int) -> List[str]:
     """
-    dict:  filename -> stats
-    stats: [ ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit,
-             link_name, line_rate, fn_rate, br_rate ]
+    dict:  filename -> stats (OverviewEntry)
     """
     global options
     if sort_type == SORT_FILE:
@@ -2698,54 +2809,60 @@ def get_sorted_keys(dict: Dict[str, List], sort_type: int) -> List[str]:
         return get_sorted_by_rate(dict, sort_type)
 
 
-def get_sorted_by_missed(dict: Dict[str, List], sort_type: int) -> List[str]:
+def get_sorted_by_missed(dict: Dict[str, OverviewEntry], sort_type: int) -> List[str]:
     """
-    dict:  filename -> stats
-    stats: [ ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit,
-             link_name, line_rate, fn_rate, br_rate ]
+    dict:  filename -> stats (OverviewEntry)
     """
     if sort_type == SORT_LINE:
         # Sort by number of instrumented lines without coverage
-        return sorted(
-            { (dict[$b][0] - dict[$b][1]) <=> (dict[$a][0] - dict[$a][1]) } dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.ln_hit - entry.ln_found
+                                     for entry in dict.values()])
     elif sort_type == SORT_FUNC:
         # Sort by number of instrumented functions without coverage
-        return sorted(
-            { (dict[$b][2] - dict[$b][3]) <=> (dict[$a][2] - dict[$a][3]) } dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.fn_hit - entry.fn_found
+                                     for entry in dict.values()])
     elif sort_type == SORT_BRANCH:
         # Sort by number of instrumented branches without coverage
-        return sorted(
-            { (dict[$b][4] - dict[$b][5]) <=> (dict[$a][4] - dict[$a][5]) } dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.br_hit - entry.br_found
+                                     for entry in dict.values()])
 
 
-def get_sorted_by_rate(dict: Dict[str, List], sort_type: int) -> List[str]:
+def get_sorted_by_rate(dict: Dict[str, OverviewEntry], sort_type: int) -> List[str]:
     """
-    dict:  filename -> stats
-    stats: [ ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit,
-             link_name, line_rate, fn_rate, br_rate ]
+    dict:  filename -> stats (OverviewEntry)
     """
     if sort_type == SORT_LINE:
         # Sort by line coverage
-        return sorted({dict[$a][7] <=> dict[$b][7]} dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.ln_rate for entry in dict.values()])
     elif sort_type == SORT_FUNC:
         # Sort by function coverage;
-        return sorted({dict[$a][8] <=> dict[$b][8]} dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.fn_rate for entry in dict.values()])
     elif sort_type == SORT_BRANCH:
         # Sort by br coverage;
-        return sorted({dict[$a][9] <=> dict[$b][9]} dict.keys()) # NOK
+        return sorted_by_keys(dict, [entry.br_rate for entry in dict.values()])
+
+
+def sorted_by_keys(dict: Dict[str, OverviewEntry], keys: List[int]) -> List[str]:
+    """Return the names of DICT sorted by their precomputed sort KEYS
+    (given in the order of DICT). Names with equal keys keep their order.
+    """
+    names = list(dict)
+    order = sorted(range(len(names)), key=keys.__getitem__)
+    return [names[index] for index in order]
 
 
 def get_affecting_tests(test_line_data:  Dict[str, Dict[int,    int]],
                         test_func_data: Dict[str, Dict[object, int]],
-                        testbrdata:  Dict[str, Dict[int,    str]]) -> Dict[str, str]:
+                        testbrdata:  Dict[str, Dict[int,    str]]
+                       ) -> Dict[str, Tuple[int, int, int, int, int, int]]:
     """test_line_data contains a mapping filename -> (linenumber -> exec count).
-    Return a hash containing mapping filename -> "lines found, lines hit, ..."
+    Return a hash containing mapping filename -> (lines found, lines hit,
+    functions found, functions hit, branches found, branches hit)
     for each filename which has a nonzero hit count.
     """
     result = {}
-    for testname in test_line_data.keys():
+    for testname, testlncount in test_line_data.items():
         # Get (line number -> count) hash for this test case
-        testlncount:  Dict[int,    int] = test_line_data[testname]
         testfnccount: Dict[object, int] = test_func_data[testname]
         testbrcount:  Dict[int,    str] = testbrdata[testname]
 
@@ -2755,32 +2872,35 @@ def get_affecting_tests(test_line_data:  Dict[str, Dict[int,    int]],
         br_found, br_hit = get_branch_found_and_hit(testbrcount)
 
         if ln_hit > 0:
-            result[testname] = f"{ln_found},{ln_hit},{fn_found},{fn_hit},{br_found},{br_hit}"
+            result[testname] = (ln_found, ln_hit, fn_found, fn_hit, br_found, br_hit)
 
     return result
 
 # NOK
 def write_source(html_handle,
                  source_filename: Path,
-                 count_data: Dict[???, ???],
-                 checkdata: Dict[int, ???],
+                 count_data: Dict[int, int],
+                 checkdata: Dict[int, str],
                  converted: Set[int],
-                 $funcdata,
-                 $sumbrcount) -> List:
+                 funcdata,
+                 sumbrcount: Dict[int, str]) -> List[str]:
     # (..., checksum_data, converted_data, func_data, ...)
     """Write an HTML view of a source code file.
     Returns a list containing data as needed by gen_png().
 
     Die on error.
     """
+    global options
     global ignore
 
     count_data = count_data or {}
+    sumbrcount = sumbrcount or {}
 
     #datafunc = reverse_dict(funcdata)  # unused
 
     try:
-        SOURCE_HANDLE = source_filename.open("rt")
+        # Split at LF only and keep CRs, like Perl's line reading
+        SOURCE_HANDLE = source_filename.open("rt", newline="\n")
     except:
         if not ignore[ERROR_SOURCE]:
             die(f"ERROR: cannot read {source_filename}")
@@ -2788,42 +2908,33 @@ def write_source(html_handle,
         # Continue without source file
         warn(f"WARNING: cannot read {source_filename}!")
 
-        last_line = 0
-        lines = sorted({ $a <=> $b } count_data.keys()) # NOK
-        if lines:
-            last_line = lines[-1]
-
+        last_line = max(count_data.keys(), default=0)
         if last_line < 1:
             return [":"]
 
-        file = []
         # Simulate gcov behavior
-        for _ in range(last_line):
-            file.append("/* EOF */")
+        file = ["/* EOF */"] * last_line
     else:
         with SOURCE_HANDLE:
-            @file = <SOURCE_HANDLE>
+            file = SOURCE_HANDLE.readlines()
 
     write_source_prolog(html_handle)
 
     result = []
-    line_number = 0
-    for $_ in file:
-        line_number += 1
-        line = $_.rstrip("\n")
-
+    for line_number, line in enumerate(file, 1):
+        line = line.rstrip("\n")
         # Also remove CR from line-end
-        s/\015$//;
+        if line.endswith("\r"): line = line[:-1]
 
         # Source code matches coverage data?
         if (line_number in checkdata and
-            checkdata[line_number] != md5_base64($_)):
+            checkdata[line_number] != line_checksum(line, options.checksum_algo)):
             die(f"ERROR: checksum mismatch  at {source_filename}:{line_number}")
 
         result.append(write_source_line(html_handle, line_number,
-                                      $_, count_data[line_number],
-                                      line_number in converted,
-                                      $sumbrcount->{line_number}))
+                                        line, count_data.get(line_number),
+                                        line_number in converted,
+                                        sumbrcount.get(line_number)))
 
     write_source_epilog(html_handle)
 
@@ -2903,12 +3014,12 @@ def write_source_line(html_handle, line_num: int, $source, hit_count: Optional[f
     html += anchor_end
     html += "\n"
 
-    write_html(html_handle, html)
     if options.br_coverage:
         # Add lines for overlong branch information
-        for br_row in @br_html:
-            write_html(html_handle,
-                       f'<span class="lineNum">         </span>{br_row}\n')
+        html += "".join(f'<span class="lineNum">         </span>{br_row}\n'
+                        for br_row in @br_html)
+
+    write_html(html_handle, html)
 
     # *************************************************************
 
@@ -3090,17 +3201,30 @@ def funcview_get_count_code(name: str, base_dir: Path, sort_type: int) -> str:
     return result
 
 
-def funcview_get_sorted(funcdata:   Dict[str, ???], # NOK
+def funcview_get_sorted_views(funcdata:    Dict[str, int],
+                              sumfnccount: Dict[str, int],
+                              sort_types:  List[int]) -> Dict[int, List[str]]:
+    """Return a dict mapping each of SORT_TYPES to the list of functions
+    sorted accordingly (see funcview_get_sorted()). Functions are sorted
+    by name only once; the order by call count is derived from it."""
+    by_name = sorted(funcdata.keys() | sumfnccount.keys())
+    views: Dict[int, List[str]] = {}
+    for sort_type in sort_types:
+        if sort_type == SORT_FILE:
+            views[sort_type] = by_name
+        else:
+            # Stable sort: functions with equal counts stay sorted by name
+            views[sort_type] = sorted(by_name,
+                                      key=lambda func: sumfnccount.get(func, 0))
+    return views
+
+
+def funcview_get_sorted(funcdata:    Dict[str, int],
                         sumfnccount: Dict[str, int],
                         sort_type: int) -> List[str]:
     """Depending on the value of sort_type, return a list of functions sorted
     by name (sort_type 0) or by the associated call count (sort_type 1)."""
-    if sort_type == SORT_FILE:
-        return sorted(funcdata.keys())
-    else:
-        return sorted({ a cmp b if sumfnccount[b] == sumfnccount[a]
-                        else sumfnccount[a] <=> sumfnccount[b]
-                      } sumfnccount.keys()) # NOK
+    return funcview_get_sorted_views(funcdata, sumfnccount, [sort_type])[sort_type]
 
 
 def subtract_counts(data: Dict[object, int],
@@ -3108,20 +3232,12 @@ def subtract_counts(data: Dict[object, int],
     """Subtract line counts found in base from those in data.
     Return (data, ln_found, ln_hit).
     """
-    ln_found = 0
-    ln_hit   = 0
-    for line, data_count in data.items():
-        ln_found += 1
+    # Only lines present in both need updating
+    for line in data.keys() & base.keys():
+        # Make sure we don't get negative numbers
+        data[line] = max(0, data[line] - base[line])
 
-        if line in base:
-            base_count = base[line]
-            data_count -= base_count
-            # Make sure we don't get negative numbers
-            data_count = max(0, data_count)
-
-        data[line] = data_count
-        if data_count > 0:
-            ln_hit += 1
+    ln_found, ln_hit = get_line_found_and_hit(data)
 
     return (data, ln_found, ln_hit)
 
@@ -3134,20 +3250,12 @@ def subtract_fnccounts(data: Optional[Dict[object, int]],
     if data is None: data = {}
     if base is None: base = {}
 
-    fn_found = 0
-    fn_hit   = 0
-    for func, data_count in data.items():
-        fn_found += 1
-
-        if func in base:
-            base_count = base[func]
-            data_count -= base_count
-            # Make sure we don't get negative numbers
-            data_count = max(0, data_count)
+    # Only functions present in both need updating
+    for func in data.keys() & base.keys():
+        # Make sure we don't get negative numbers
+        data[func] = max(0, data[func] - base[func])
 
-        data[func] = data_count
-        if data_count > 0:
-            fn_hit += 1
+    fn_found, fn_hit = get_func_found_and_hit(data)
 
     return (data, fn_found, fn_hit)
 
@@ -3255,15 +3363,17 @@ def remove_unused_descriptions():
              (before - after), after))
 
 
-def apply_prefix(filename, prefixes: List[str]):
+@lru_cache(maxsize=4096)
+def apply_prefix(filename, prefixes: Tuple[str, ...]):
     # If FILENAME begins with PREFIX from PREFIXES,
     # remove PREFIX from FILENAME and return resulting string,
     # otherwise return FILENAME.
+    # PREFIXES has to be a tuple so that results can be cached.
     if prefixes:
         for prefix in prefixes:
             if filename == prefix:
                 return "root"
-            if prefix != "" and re.match(rf"^\Q{prefix}\E/(.*)$", filename):
+            if prefix != "" and filename.startswith(prefix + "/"):
                 return filename[len(prefix) + 1:]
     return filename
 
@@ -3341,21 +3451,14 @@ def rename_functions(info: Dict[???, ???], conv: Dict[???, ???]): # NOK
         data["sumfnc"] = newsumfnccount
 
         # Update function found and hit counts since they may have changed
-        f_found = 0
-        f_hit   = 0
-        for ccount in newsumfnccount.values():
-            f_found += 1
-            if ccount > 0:
-                f_hit += 1
-        data["f_found"] = f_found
-        data["f_hit"]   = f_hit
+        data["f_found"], data["f_hit"] = get_func_found_and_hit(newsumfnccount)
 
 
-def get_fn_list(info: Dict[???, ???]) -> List[???]: # NOK
+def get_fn_list(info: Dict[str, Dict[str, object]]) -> List[str]:
     """ """
     fns = set()
     for data in info.values():
-        if "func" in data and data["func"] is not None):
+        if "func" in data and data["func"] is not None:
             for func_name in data["func"].keys():
                 fns.add(func_name)
         if "sumfnc" in data and data["sumfnc"] is not None:
@@ -3379,19 +3482,32 @@ def parse_dir_prefix(prefixes: Optional[List]):
             dir_prefix.append(item)
 
 
-def demangle_list(func_list: List[str]) -> Dict[str, str]:
-    """ """
+def demangle_names(func_list: List[str]):
+    """Demangle all names of FUNC_LIST which were not demangled yet and
+    store the translations in the demangled_names cache.
+
+    All missing names are passed to a single c++filt run, so that the tool
+    is started once per batch instead of once per source file.
+
+    Die on error.
+    """
     global options
+    global demangled_names
+    import subprocess
+
+    func_list = [func for func in dict.fromkeys(func_list)
+                 if func not in demangled_names]
+    if not func_list: return
 
     # Extra flag necessary on OS X so that symbols listed by gcov
     # get demangled properly.
     demangle_args = options.demangle_cpp_params
-    if demangle_args == "" and $^O == "darwin": # NOK
+    if demangle_args == "" and sys.platform == "darwin":
         demangle_args = "--no-strip-underscore"
     # Build translation hash from c++filt output
     try:
-        process = subprocess.run([options.demangle_cpp_tool, demangle_args],
-                                 input="\n".join(func_list), capture_output=True,
+        process = subprocess.run([options.demangle_cpp_tool] + demangle_args.split(),
+                                 input="\n".join(func_list) + "\n", capture_output=True,
                                  encoding="utf-8", check=True)
     except Exception as exc:
         die(f"ERROR: could not run c++filt: {exc}!")
@@ -3400,9 +3516,24 @@ def demangle_list(func_list: List[str]) -> Dict[str, str]:
         die("ERROR: c++filt output not as expected ({} vs {}) lines".format(
             len(flines), len(func_list)))
 
+    demangled_names.update(zip(func_list, flines))
+
+
+def demangle_list(func_list: List[str]) -> Dict[str, str]:
+    """Return a dict mapping each name of FUNC_LIST to its demangled
+    version. Names demangling to the same string are distinguished by
+    a version suffix (.2, .3, ...).
+
+    Die on error.
+    """
+    global demangled_names
+
+    demangle_names(func_list)
+
     demangle: Dict[str, str] = {}
     versions: Dict[str, int] = {}
-    for func, translated in zip(func_list, flines):
+    for func in func_list:
+        translated = demangled_names[func]
         if translated not in versions:
             versions[translated] = 1
         else:
@@ -3414,6 +3545,7 @@ def demangle_list(func_list: List[str]) -> Dict[str, str]:
     return demangle
 
 
+@lru_cache(maxsize=None)
 def get_rate(found: int, hit: int) -> int:
     """Return a relative value for the specified found&hit values
     which is used for sorting the corresponding entries in a
@@ -3428,12 +3560,27 @@ def create_sub_dir(dir: Path, *, exist_ok=False):
     """Create subdirectory dir if it does not already exist,
     including all its parent directories.
 
+    Directories created by an earlier call of this run are skipped
+    without touching the file system. Directories which existed before
+    are handled by mkdir() as usual (i.e. fail unless EXIST_OK is set).
+
     Die on error.
     """
+    global created_dirs
+    abs_dir = dir.absolute()
+    if str(abs_dir) in created_dirs:
+        return
+    # Directories which mkdir() is about to create
+    new_dirs = []
+    for path in (abs_dir, *abs_dir.parents):
+        if path.exists(): break
+        new_dirs.append(str(path))
     try:
-        dir.mkdir(parents=True, exist_ok=exist_ok)
+        abs_dir.mkdir(parents=True, exist_ok=exist_ok)
     except:
-        and die(f"ERROR: cannot create directory {dir}!")
+        die(f"ERROR: cannot create directory {dir}!")
+    # Remember only the directories created by this run
+    created_dirs.update(new_dirs)
 
 
 def info(format, *pars, *, end="\n"):
@@ -3449,6 +3596,14 @@ def main(argv=sys.argv[1:]):
     """\
     """
     global tool_name, lcov_version, lcov_url
+    global options
+    global args
+    global config
+    global ignore
+    global html_prolog
+    global html_epilog
+    global fileview_sortlist
+    global funcview_sortlist
 
     def warn_handler(msg: str):
         global tool_name
@@ -3463,6 +3618,184 @@ def main(argv=sys.argv[1:]):
     # $SIG{__WARN__} = warn_handler
     # $SIG{__DIE__}  = die_handler
 
+    # Check command line for a configuration file name
+    Getopt::Long::Configure("pass_through", "no_auto_abbrev")
+    GetOptions("config-file=s" => \args.config_file,
+               "rc=s%"         => \args.rc)
+    Getopt::Long::Configure("default")
+
+    # Remove spaces around rc options
+    args.rc = strip_spaces_in_options(args.rc)
+    # Read configuration file if available
+    config = read_lcov_config_file(Path(args.config_file)
+                                    if args.config_file else None)
+
+    if config or args.rc:
+        # Copy configuration file and --rc values to variables
+        # (--rc values take precedence over the configuration file)
+        for key, attr, value_type in CONFIG_MAP:
+            if key in args.rc:
+                value = args.rc[key]
+            elif config and key in config:
+                value = config[key]
+            else:
+                continue
+            try:
+                setattr(options, attr, value_type(value))
+            except ValueError:
+                die(f"ERROR: invalid value for {key}: {value}")
+
+    # Copy related values if not specified
+    for attr, default_attr in OPTION_FALLBACKS:
+        if getattr(options, attr) is None:
+            setattr(options, attr, getattr(options, default_attr))
+
+    # Parse command line options
+    if (!GetOptions(
+            "output-directory|o=s" => \$output_directory,
+            "title|t=s"            => \args.test_title,
+            "description-file|d=s" => \$desc_filename,
+            "keep-descriptions|k"  => \options.keep_descriptions,
+            "css-file|c=s"         => \options.css_filename,
+            "baseline-file|b=s"    => \args.base_filename,
+            "prefix|p=s"           => \args.dir_prefix,
+            "num-spaces=i"         => \options.tab_size,
+            "no-prefix"            => \options.no_prefix,
+            "no-sourceview"        => \options.no_sourceview,
+            "show-details|s"       => \options.show_details,
+            "frames|f"             => \args.frames,
+            "highlight"            => \options.highlight,
+            "legend"               => \options.legend,
+            "quiet|q"              => \args.quiet,
+            "help|h|?"             => \args.help,
+            "version|v"            => \args.version,
+            "html-prolog=s"        => \options.html_prolog_file,
+            "html-epilog=s"        => \options.html_epilog_file,
+            "html-extension=s"     => \options.html_ext,
+            "html-gzip"            => \options.html_gzip,
+            "function-coverage"    => \options.fn_coverage,
+            "no-function-coverage" => \options.no_fn_coverage,
+            "branch-coverage"      => \options.br_coverage,
+            "no-branch-coverage"   => \options.no_br_coverage,
+            "sort"                 => \options.sort,
+            "no-sort"              => \options.no_sort,
+            "demangle-cpp"         => \options.demangle_cpp,
+            "ignore-errors=s"      => \args.ignore_errors,
+            "config-file=s"        => \args.config_file,
+            "rc=s%"                => \args.rc,
+            "precision=i"          => \options.default_precision,
+            "missed"               => \options.missed,
+            "dark-mode"            => \options.dark_mode,
+            "checksum-algo=s"      => \options.checksum_algo,
+            "jobs|j=i"             => \args.jobs,
+            "cache"                => \args.cache,
+            )):
+        print(f"Use {tool_name} --help to get usage information", file=sys.stderr)
+        sys.exit(1)
+
+    # Merge options
+    if options.no_fn_coverage:
+        options.fn_coverage = False
+    if options.no_br_coverage:
+        options.br_coverage = False
+    if options.no_sort:
+        options.sort = False
+
+    args.info_filenames = [Path(fname) for fname in @ARGV]
+
+    # Check for help option
+    if args.help:
+        print_usage(sys.stdout)
+        sys.exit(0)
+
+    # Check for version option
+    if args.version:
+        print(f"{tool_name}: {lcov_version}")
+        sys.exit(0)
+
+    # Determine which errors the user wants us to ignore
+    parse_ignore_errors(args.ignore_errors, ignore)
+    # Split the list of prefixes if needed
+    parse_dir_prefix(args.dir_prefix)
+
+    # Check for info filename
+    if not args.info_filenames:
+        die("No filename specified\n"
+            f"Use {tool_name} --help to get usage information")
+
+    # Generate a title if none is specified
+    if not args.test_title:
+        if len(args.info_filenames) == 1:
+            # Only one filename specified, use it as title
+            args.test_title = basename(args.info_filenames[0])
+        else:
+            # More than one filename specified, used default title
+            args.test_title = "unnamed"
+
+    # Make sure css_filename is an absolute path (in case we're changing
+    # directories)
+    if options.css_filename is not None:
+        if not options.css_filename.startswith("/"):
+            options.css_filename = str(cwd/options.css_filename)
+
+    # Make sure tab_size is within valid range
+    if options.tab_size < 1:
+        print(f"ERROR: invalid number of spaces specified: {options.tab_size}!",
+              file=sys.stderr)
+        sys.exit(1)
+
+    # Get HTML prolog and epilog
+    html_prolog = get_html_prolog(Path(options.html_prolog_file)
+                                  if options.html_prolog_file else None)
+    html_epilog = get_html_epilog(Path(options.html_epilog_file)
+                                  if options.html_epilog_file else None)
+
+    # Issue a warning if --no-sourceview is enabled together with --frames
+    if options.no_sourceview and args.frames is not None:
+        warn("WARNING: option --frames disabled because --no-sourceview "
+             "was specified!")
+        args.frames = None
+
+    # Issue a warning if --no-prefix is enabled together with --prefix
+    if options.no_prefix and dir_prefix:
+        warn("WARNING: option --prefix disabled because --no-prefix was "
+             "specified!")
+        dir_prefix.clear()
+
+    fileview_sortlist = [SORT_FILE]
+    funcview_sortlist = [SORT_FILE]
+    if options.sort:
+        fileview_sortlist.append(SORT_LINE)
+        if options.fn_coverage:
+            fileview_sortlist.append(SORT_FUNC)
+        if options.br_coverage:
+            fileview_sortlist.append(SORT_BRANCH)
+        funcview_sortlist.append(SORT_LINE)
+
+    # Ensure that the c++filt tool is available when using --demangle-cpp
+    if options.demangle_cpp:
+        if system_no_output(3, options.demangle_cpp_tool, "--version")[0] != NO_ERROR:
+            die(f"ERROR: could not find {options.demangle_cpp_tool} tool needed for "
+                "--demangle-cpp")
+
+    # Make sure precision is within valid range
+    if not (1 <= options.default_precision <= 4):
+        die("ERROR: specified precision is out of range (1 to 4)")
+
+    # Make sure number of jobs is within valid range
+    if args.jobs < 1:
+        die(f"ERROR: invalid number of jobs specified: {args.jobs}!")
+
+    # Check checksum algorithm
+    check_checksum_algo(options.checksum_algo)
+
+    # Make sure output_directory exists, create it if necessary
+    if $output_directory:
+        create_sub_dir(Path($output_directory), exist_ok=True)
+
+    # Do something
+    gen_html()
+
 
 if __name__.rpartition(".")[-1] == "__main__":
     sys.exit(main())
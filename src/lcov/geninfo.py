@@ -63,6 +63,7 @@ from .util import system_no_output, NO_ERROR
 from .util import transform_pattern
 from .util import strip_spaces_in_options
 from .util import parse_ignore_errors
+from .util import line_checksum, check_checksum_algo
 from .util import warn, die
 
 # Constants
@@ -90,6 +91,9 @@ ERROR_ID = {
     "graph":  ERROR_GRAPH,
 }
 
+# Buffer size of written tracefiles
+INFO_BUFFER_SIZE = 64 * 1024
+
 EXCL_START = "LCOV_EXCL_START"
 EXCL_STOP  = "LCOV_EXCL_STOP"
 
@@ -172,6 +176,7 @@ $base_directory: Optional = None
 args.version: bool = False  # Version option flag
 args.follow:  bool = False
 our $checksum;
+options.checksum_algo: str = "md5"  # Algorithm used for line checksums
 options.no_checksum:    Optional[bool] = None  # If set, don't calculate a checksum for each line
 options.compat_libtool: Optional[bool] = None
 args.no_compat_libtool: Optional[bool] = None
@@ -242,6 +247,7 @@ if $config or %opt_rc:
         "geninfo_adjust_testname"     => \options.adjust_testname,
         "geninfo_checksum"            => \$checksum,
         "geninfo_no_checksum"         => \options.no_checksum, # deprecated
+        "geninfo_checksum_algo"       => \options.checksum_algo,
         "geninfo_compat_libtool"      => \options.compat_libtool,
         "geninfo_external"            => \options.external,
         "geninfo_gcov_all_blocks"     => \options.gcov_all_blocks,
@@ -292,6 +298,7 @@ if (!GetOptions(
         "output-filename|o=s" => \args.output_filename,
         "checksum"            => \$checksum,
         "no-checksum"         => \options.no_checksum,
+        "checksum-algo=s"     => \options.checksum_algo,
         "base-directory|b=s"  => \args.base_directory,
         "version|v"           => \args.version,
         "quiet|q"             => \args.quiet,
@@ -413,6 +420,10 @@ if args.base_directory:
 # Determine checksum mode (default is off)
 $checksum = bool($checksum) if $checksum is not None else False
 
+# Check checksum algorithm
+if $checksum:
+    check_checksum_algo(options.checksum_algo)
+
 # Check for directory name
 if ! @data_directory:
     die(f"No directory specified\n"
@@ -483,6 +494,7 @@ sequentially.
   -f, --follow                      Follow links when searching .da/.gcda files
   -b, --base-directory DIR          Use DIR as base directory for relative paths
       --(no-)checksum               Enable (disable) line checksumming
+      --checksum-algo ALGO          Use ALGO for line checksums (md5, sha256, blake3)
       --(no-)compat-libtool         Enable (disable) libtool compatibility mode
       --gcov-tool TOOL              Specify gcov tool location
       --ignore-errors ERROR         Continue after ERROR (gcov, source, graph)
@@ -811,7 +823,7 @@ def process_dafile(da_filename: Path, $dir):
         else:
             # Open .info file for output
             try:
-                INFO_HANDLE = Path(f"{da_filename}.info").open("wt")
+                INFO_HANDLE = Path(f"{da_filename}.info").open("wt", buffering=INFO_BUFFER_SIZE)
             except:
                 die(f"ERROR: cannot create {da_filename}.info!")
 
@@ -1010,7 +1022,8 @@ def process_dafile(da_filename: Path, $dir):
                     $ln_found += 1
                     printf(INFO_HANDLE f"DA:{line_number},".
                            $gcov_content[1].($checksum ?
-                           ",". md5_base64($gcov_content[2]) : "").
+                           ",". line_checksum($gcov_content[2],
+                                              options.checksum_algo) : "").
                            "\n");
                     # Increase $ln_hit in case of an execution
                     # count>0
@@ -1737,7 +1750,7 @@ def get_output_fd(outfile: Optional[str], $file):
     """ """
     if outfile is None:
         try:
-            fhandle = Path(f"{file}.info").open("wt")
+            fhandle = Path(f"{file}.info").open("wt", buffering=INFO_BUFFER_SIZE)
         except Exception as exc:
             die(f"ERROR: Cannot create file {file}.info: {exc}")
     elif outfile == "-":
@@ -2082,7 +2095,7 @@ def get_source_data(filename: Path) -> Optional[Tuple[???, ???, ???]]:
                 $brdata{$.} = 2
             if $checksum:
                 chomp();
-                $checksums{$.} = md5_base64($_)
+                $checksums{$.} = line_checksum($_, options.checksum_algo)
             if (intermediate and "json-format" not in gcov_capabilities and
                 /($EXCL_EXCEPTION_BR_STOP|$EXCL_EXCEPTION_BR_START|$options.excl_exception_br_line)/):
                 warn(f"WARNING: $1 found at {filename}:$. but branch exceptions "
@@ -2155,7 +2168,7 @@ def process_graphfile(graph_filename: Path, $dir):
     else:
         # Open .info file for output
         try:
-            INFO_HANDLE = Path(f"{graph_filename}.info").open("wt")
+            INFO_HANDLE = Path(f"{graph_filename}.info").open("wt", buffering=INFO_BUFFER_SIZE)
         except:
             die(f"ERROR: cannot create {graph_filename}.info!")
 
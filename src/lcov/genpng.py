@@ -19,10 +19,11 @@ genpng
 #use strict;
 #use warnings;
 
-from typing import List
+from typing import List, Tuple, Dict
 import argparse
 import sys
 import re
+import hashlib
 from pathlib import Path
 
 # Constants
@@ -30,6 +31,12 @@ tool_name    = Path(__file__).stem
 lcov_version = "LCOV version " #+ `${abs_path(dirname($0))}/get_version.sh --full`
 lcov_url     = "http://ltp.sourceforge.net/coverage/lcov.php"
 
+# Number of most recently rendered images kept for reuse
+PNG_CACHE_SIZE = 16
+
+# (dark_mode, width, tab_size, digest of source) -> encoded PNG image
+png_cache: Dict[Tuple[bool, int, int, bytes], bytes] = {}
+
 
 def genpng_process_file(filename: Path, out_filename: Path,
                         width: int, tab_size: int):
@@ -85,6 +92,33 @@ def gen_png(filename: Path,   # Filename for PNG file
     #
     # Die on error.
 
+    # Sources with identical contents and coverage (e.g. copies of the
+    # same file) are only rendered once. Cache entries are keyed by a
+    # digest, so that the source lines themselves are not kept alive.
+    digest = hashlib.blake2b(digest_size=16)
+    for line in source:
+        digest.update(line.encode("utf-8", "surrogateescape"))
+        digest.update(b"\n")
+    key = (bool(dark_mode), width, tab_size, digest.digest())
+
+    png_data = png_cache.pop(key, None)
+    if png_data is None:
+        png_data = render_png(dark_mode, width, tab_size, source)
+    png_cache[key] = png_data  # Most recently used entry comes last
+    if len(png_cache) > PNG_CACHE_SIZE:
+        del png_cache[next(iter(png_cache))]
+
+    # Write PNG file
+    with filename.open("wb") as file:
+        #or raise OSError(f"ERROR: cannot write png file {filename}!\n");
+        file.write(png_data)
+
+
+def render_png(dark_mode: bool, width: int, tab_size: int,
+               source: List[str]) -> bytes:
+    # Return the encoded overview PNG image of SOURCE as written by
+    # gen_png().
+
     # Handle empty source files
     if not source: source = [""]
 
@@ -191,10 +225,7 @@ def gen_png(filename: Path,   # Filename for PNG file
         last_count = match.group(2)
         row += 1
 
-    # Write PNG file
-    with filename.open("wb") as file:
-        #or raise OSError(f"ERROR: cannot write png file {filename}!\n");
-        file.write(overview.png())
+    return overview.png()
 
 
 def main(argv=sys.argv[1:]):
@@ -57,12 +57,14 @@ lcov
 #use Getopt::Long;
 #use Cwd qw //;
 
-from typing import List, Dict, Optional
+from typing import List, Tuple, Dict, Callable, Optional
 import argparse
 import sys
+import os
 import re
 import shutil
 from pathlib import Path
+from functools import lru_cache
 
 from .types import DB, LineData, BlockData, ChecksumData, InfoData, InfoEntry, BranchCountData
 from .util import reverse_dict
@@ -71,6 +73,7 @@ from .util import apply_config
 from .util import transform_pattern
 from .util import system_no_output, NO_ERROR
 from .util import strip_spaces_in_options
+from .util import process_pool
 from .util import warn, die
 
 # Global constants
@@ -95,6 +98,9 @@ pkg_build_file = ".build_directory"
 BR_SUB = 0
 BR_ADD = 1
 
+# Buffer size of written tracefiles
+INFO_BUFFER_SIZE = 64 * 1024
+
 # Global variables & initialization
 options.gcov_dir:       Optional[Path] = None  # Directory containing gcov kernel files
 options.tmp_dir:        Optional[Path] = None  # Where to create temporary directories
@@ -128,6 +134,7 @@ args.ignore_errors:     List[str] = []         # Ignore certain error classes du
 args.initial:           bool = False
 args.include_patterns:  List[str] = []         # List of source file patterns to include
 args.exclude_patterns:  List[str] = []         # List of source file patterns to exclude
+args.jobs:              int = 1                # Number of tracefiles read in parallel
 args.no_recursion:      bool = False
 args.to_package:        Optional[Path] = None
 args.from_package:      Optional[Path] = None
@@ -157,202 +164,9 @@ fn_overall_hit:   Optional[int] = None
 br_overall_found: Optional[int] = None
 br_overall_hit:   Optional[int] = None
 
-cwd = Path.cwd()  # Current working directory
-
-#
-# Code entry point
-#
-
-# Check command line for a configuration file name
-Getopt::Long::Configure("pass_through", "no_auto_abbrev")
-GetOptions("config-file=s": \Path(args.config_file),
-           "rc=s%":         \args.rc);
-Getopt::Long::Configure("default");
-
-# Remove spaces around rc options
-args.rc = strip_spaces_in_options(args.rc)
-# Read configuration file if available
-$config = read_lcov_config_file(args.config_file)
-
-if $config or args.rc:
-    # Copy configuration file and --rc values to variables
-    apply_config({
-        "lcov_gcov_dir":          \Path(options.gcov_dir),
-        "lcov_tmp_dir":           \options.tmp_dir,
-        "lcov_list_full_path":    \options.list_full_path,
-        "lcov_list_width":        \options.list_width,
-        "lcov_list_truncate_max": \options.list_truncate_max,
-        "lcov_branch_coverage":   \options.br_coverage,
-        "lcov_function_coverage": \options.fn_coverage,
-        "lcov_fail_under_lines":  \options.fail_under_lines,
-    })
-
-# Parse command line options
-if (!GetOptions(
-        "directory|d|di=s"     => \args.directory,
-        "add-tracefile|a=s"    => \args.add_tracefile,
-        "list|l=s"             => \args.list,
-        "kernel-directory|k=s" => \args.kernel_directory,
-        "extract|e=s"          => \args.extract,
-        "remove|r=s"           => \args.remove,
-        "diff=s"               => \args.diff,
-        "convert-filenames"    => \args.convert_filenames,
-        "strip=i"              => \args.strip,
-        "capture|c"            => \args.capture,
-        "output-file|o=s"      => \args.output_filename,
-        "test-name|t=s"        => \args.test_name,
-        "zerocounters|z"       => \args.reset,
-        "quiet|q"              => \args.quiet,
-        "help|h|?"             => \args.help,
-        "version|v"            => \args.version,
-        "follow|f"             => \args.follow,
-        "path=s"               => \args.diff_path,
-        "base-directory|b=s"   => \Path(args.base_directory),
-        "checksum"             => \args.checksum,
-        "no-checksum"          => \args.no_checksum,
-        "compat-libtool"       => \args.compat_libtool,
-        "no-compat-libtool"    => \args.no_compat_libtool,
-        "gcov-tool=s"          => \args.gcov_tool,
-        "ignore-errors=s"      => \args.ignore_errors,
-        "initial|i"            => \args.initial,
-        "include=s"            => \args.include_patterns,
-        "exclude=s"            => \args.exclude_patterns,
-        "no-recursion"         => \args.no_recursion,
-        "to-package=s"         => \Path(args.to_package),
-        "from-package=s"       => \Path(args.from_package),
-        "no-markers"           => \args.no_markers,
-        "derive-func-data"     => \args.derive_func_data,
-        "debug"                => \args.debug,
-        "list-full-path"       => \options.list_full_path,
-        "no-list-full-path"    => \args.no_list_full_path,
-        "external"             => \args.external,
-        "no-external"          => \args.no_external,
-        "summary=s"            => \args.summary,
-        "compat=s"             => \args.compat,
-        "config-file=s"        => \Path(args.config_file),
-        "rc=s%"                => \args.rc,
-        "fail-under-lines=s"   => \options.fail_under_lines,
-        )):
-    print(f"Use {tool_name} --help to get usage information", file=sys.stderr)
-    sys.exit(1)
-
-# Merge options
-if args.no_checksum is not None:
-    args.checksum = not args.no_checksum
-if args.no_compat_libtool is not None:
-    args.compat_libtool = not args.no_compat_libtool
-    args.no_compat_libtool = None
-if args.no_list_full_path is not None:
-    options.list_full_path = not args.no_list_full_path
-    del args.no_list_full_path
-if args.no_external is not None:
-    args.external = False
-    del args.no_external
-
-# Check for help option
-if args.help:
-    print_usage(sys.stdout)
-    sys.exit(0)
-
-# Check for version option
-if args.version:
-    print(f"{tool_name}: {lcov_version}")
-    sys.exit(0)
-
-# Check list width option
-if options.list_width <= 40:
-    die("ERROR: lcov_list_width parameter out of range (needs to be "
-        "larger than 40)")
-
-# Normalize --path text
-args.diff_path = re.sub(r"/$", "", args.diff_path)
-
-# Check for valid options
-check_options()
-
-# Only --extract, --remove and --diff allow unnamed parameters
-if args.ARGV and not (args.extract is not None or
-                      args.remove  is not None or
-                      args.diff    is not None or
-                      args.summary):
-    die("Extra parameter found: '{}'\n".format(" ".join(args.ARGV)) +
-        f"Use {tool_name} --help to get usage information")
-
-# If set, indicates that data is written to stdout
-# Check for output filename
-data_to_stdout: bool = not (args.output_filename and args.output_filename != "-")
-
-if args.capture:
-    if data_to_stdout:
-        # Option that tells geninfo to write to stdout
-        args.output_filename = "-"
-
-# Determine kernel directory for gcov data
-if not args.from_package and not args.directory and (args.capture or args.reset):
-    gcov_gkv, options.gcov_dir = setup_gkv()
-
-our $exit_code = 0
-# Check for requested functionality
-if args.reset:
-    data_to_stdout = False
-    # Differentiate between user space and kernel reset
-    if args.directory:
-        userspace_reset()
-    else:
-        kernel_reset()
-elif args.capture:
-    # Capture source can be user space, kernel or package
-    if args.from_package:
-        package_capture()
-    elif args.directory:
-        userspace_capture()
-    else:
-        if args.initial:
-            if args.to_package:
-                die("ERROR: --initial cannot be used together with --to-package")
-            kernel_capture_initial()
-        else:
-            kernel_capture()
-elif args.add_tracefile:
-    (ln_overall_found, ln_overall_hit,
-     fn_overall_found, fn_overall_hit,
-     br_overall_found, br_overall_hit) = add_traces()
-elif args.remove is not None:
-    (ln_overall_found, ln_overall_hit,
-     fn_overall_found, fn_overall_hit,
-     br_overall_found, br_overall_hit) = remove()
-elif args.extract is not None:
-    (ln_overall_found, ln_overall_hit,
-     fn_overall_found, fn_overall_hit,
-     br_overall_found, br_overall_hit) = extract()
-elif args.list:
-    data_to_stdout = False
-    listing()
-elif args.diff is not None:
-    if len(args.ARGV) != 1:
-        die("ERROR: option --diff requires one additional argument!\n"
-            f"Use {tool_name} --help to get usage information")
-    (ln_overall_found, ln_overall_hit,
-     fn_overall_found, fn_overall_hit,
-     br_overall_found, br_overall_hit) = diff()
-elif args.summary:
-    data_to_stdout = False
-    (ln_overall_found, ln_overall_hit,
-     fn_overall_found, fn_overall_hit,
-     br_overall_found, br_overall_hit) = summary()
-    $exit_code = check_rates(ln_overall_found, ln_overall_hit)
-
-temp_cleanup()
+data_to_stdout: bool = False  # If set, data is written to stdout
 
-if ln_overall_found is not None:
-    print_overall_rate(True, ln_overall_found, ln_overall_hit,
-                       True, fn_overall_found, fn_overall_hit,
-                       True, br_overall_found, br_overall_hit)
-else:
-    if not args.list and not args.capture:
-        info("Done.")
-
-sys.exit($exit_code)
+cwd = Path.cwd()  # Current working directory
 
 
 def print_usage(fhandle):
@@ -409,6 +223,7 @@ Options:
       --exclude PATTERN           Exclude files matching PATTERN
       --fail-under-lines MIN      Exit with a status of 1 if the total line
                                   coverage is less than MIN (summary option).
+  -j, --jobs NUM                  Read up to NUM tracefiles in parallel
 
 For more information see: {lcov_url}""", file=fhandle)
 
@@ -1096,7 +911,7 @@ def compress_brcount(brcount: BranchCountData) -> Tuple[BranchCountData, int, in
     return db_to_brcount(db, brcount)
 
 # NOK
-def read_info_file($tracefile) -> InfoData:
+def read_info_file(tracefile: Path) -> InfoData:
     # read_info_file(info_filename)
     #
     # Read in the contents of the .info file specified by INFO_FILENAME. Data will
@@ -1137,8 +952,7 @@ def read_info_file($tracefile) -> InfoData:
     # will automatically be combined by adding all execution counts.
     #
     # Note that if INFO_FILENAME ends with ".gz", it is assumed that the file
-    # is compressed using GZIP. If available, GUNZIP will be used to decompress
-    # this file.
+    # is compressed using GZIP.
     #
     # Die on error.
 
@@ -1164,154 +978,144 @@ def read_info_file($tracefile) -> InfoData:
 
     result: InfoData = {}  # Resulting hash: file -> data
 
-    info("Reading tracefile $tracefile")
+    tracefile = Path(tracefile)
+
+    info(f"Reading tracefile {tracefile}")
 
     # Check if file exists and is readable
-    if not os.access($_[0], os.R_OK):
-        die("ERROR: cannot read file $_[0]!")
+    if not os.access(tracefile, os.R_OK):
+        die(f"ERROR: cannot read file {tracefile}!")
     # Check if this is really a plain file
-    fstatus = Path($_[0]).stat()
-    if ! (-f _):
-        die("ERROR: not a plain file: $_[0]!")
-
-    # Check for .gz extension
-    if $_[0] =~ /\.gz$/:
-        # Check for availability of GZIP tool
-        if system_no_output(1, "gunzip" ,"-h")[0] != NO_ERROR:
-            die("ERROR: gunzip command not available!")
-
-        # Check integrity of compressed file
-        if system_no_output(1, "gunzip", "-t", $_[0])[0] != NO_ERROR:
-            die("ERROR: integrity check failed for "
-                "compressed file $_[0]!")
-
-        # Open compressed file
+    if not tracefile.is_file():
+        die(f"ERROR: not a plain file: {tracefile}!")
+
+    # Read in all lines, decompressing if needed
+    if tracefile.suffix == ".gz":
+        import gzip
         try:
-            INFO_HANDLE = open("-|", "gunzip -c '$_[0]'")
-        except:
-            die("ERROR: cannot start gunzip to decompress file $_[0]!")
+            with gzip.open(tracefile, "rt") as fhandle:
+                lines = fhandle.read().splitlines()
+        except (OSError, EOFError):
+            die(f"ERROR: integrity check failed for compressed file {tracefile}!")
     else:
-        # Open decompressed file
         try:
-            INFO_HANDLE = open("rt", $_[0])
+            with tracefile.open("rt") as fhandle:
+                lines = fhandle.read().splitlines()
         except:
-            die("ERROR: cannot read file $_[0]!")
+            die(f"ERROR: cannot read file {tracefile}!")
 
     testname = ""  # Current test name
-    with INFO_HANDLE:
-        for line in INFO_HANDLE:
-            line = line.rstrip("\n")
-
-            match = re.match(r"^TN:([^,]*)(,diff)?", line)
-            if match:
-                # Test name information found
-                testname = defined($1) ? $1 : "";
-                if (testname =~ s/\W/_/g):
-                    changed_testname = True
-                testname .= $2 if (defined($2));
-                continue
+    for line in lines:
+        match = re.match(r"^TN:([^,]*)(,diff)?", line)
+        if match:
+            # Test name information found
+            testname = defined($1) ? $1 : "";
+            if (testname =~ s/\W/_/g):
+                changed_testname = True
+            testname .= $2 if (defined($2));
+            continue
 
-            match = re.match(r"^[SK]F:(.*)", line)
-            if match:
-                # Filename information found
-                # Retrieve data for new entry
-                $filename = $1;
+        match = re.match(r"^[SK]F:(.*)", line)
+        if match:
+            # Filename information found
+            # Retrieve data for new entry
+            $filename = $1;
+
+            $data: Dict[str, object] = $result{$filename}
+            ($testdata, $sumcount, $funcdata, $checkdata,
+             $testfncdata, $sumfnccount,
+             $testbrdata,  $sumbrcount,
+             _, _, _, _, _, _) = get_info_entry(data)
+
+            if defined($testname):
+                testcount    = $testdata[testname]
+                testfnccount = $testfncdata[testname]
+                testbrcount  = $testbrdata[testname]
+            else:
+                testcount    = {}
+                testfnccount = {}
+                testbrcount  = {}
+            continue
 
-                $data: Dict[str, object] = $result{$filename}
-                ($testdata, $sumcount, $funcdata, $checkdata,
-                 $testfncdata, $sumfnccount,
-                 $testbrdata,  $sumbrcount,
-                 _, _, _, _, _, _) = get_info_entry(data)
+        match = re.match(r"^DA:(\d+),(-?\d+)(,[^,\s]+)?", line)
+        if match:
+            # Fix negative counts
+            $count = $2 < 0 ? 0 : $2;
+            if $2 < 0:
+                negative = True
+            # Execution count found, add to structure
+            # Add summary counts
+            $sumcount->{$1} += $count
+
+            # Add test-specific counts
+            if defined($testname):
+                $testcount->{$1} += $count
+
+            # Store line checksum if available
+            if defined($3):
+                line_checksum = $3[1:]
+                # Does it match a previous definition
+                if $1 in $checkdata and $checkdata->{$1} != line_checksum:
+                    die(f"ERROR: checksum mismatch at {filename}:$1")
+                $checkdata->{$1} = line_checksum
+            continue
+
+        match = re.match(r"^FN:(\d+),([^,]+)", line)
+        if match:
+            if options.fn_coverage:
+                # Function data found, add to structure
+                $funcdata->{$2} = $1;
+
+                # Also initialize function call data
+                if (!defined($sumfnccount->{$2}))
+                    $sumfnccount->{$2} = 0;
 
                 if defined($testname):
-                    testcount    = $testdata[testname]
-                    testfnccount = $testfncdata[testname]
-                    testbrcount  = $testbrdata[testname]
-                else:
-                    testcount    = {}
-                    testfnccount = {}
-                    testbrcount  = {}
-                continue
+                    if (!defined($testfnccount->{$2}))
+                        $testfnccount->{$2} = 0;
+            continue
 
-            match = re.match(r"^DA:(\d+),(-?\d+)(,[^,\s]+)?", line)
-            if match:
-                # Fix negative counts
-                $count = $2 < 0 ? 0 : $2;
-                if $2 < 0:
-                    negative = True
-                # Execution count found, add to structure
+        match = re.match(r"^FNDA:(\d+),([^,]+)", line)
+        if match:
+             if options.fn_coverage:
+                # Function call count found, add to structure
                 # Add summary counts
-                $sumcount->{$1} += $count
+                $sumfnccount->{$2} += $1;
 
                 # Add test-specific counts
                 if defined($testname):
-                    $testcount->{$1} += $count
-
-                # Store line checksum if available
-                if defined($3):
-                    line_checksum = $3[1:]
-                    # Does it match a previous definition
-                    if $1 in $checkdata and $checkdata->{$1} != line_checksum:
-                        die(f"ERROR: checksum mismatch at {filename}:$1")
-                    $checkdata->{$1} = line_checksum
-                continue
-
-            match = re.match(r"^FN:(\d+),([^,]+)", line)
-            if match:
-                if options.fn_coverage:
-                    # Function data found, add to structure
-                    $funcdata->{$2} = $1;
-
-                    # Also initialize function call data
-                    if (!defined($sumfnccount->{$2}))
-                        $sumfnccount->{$2} = 0;
-
-                    if defined($testname):
-                        if (!defined($testfnccount->{$2}))
-                            $testfnccount->{$2} = 0;
-                continue
-
-            match = re.match(r"^FNDA:(\d+),([^,]+)", line)
-            if match:
-                 if options.fn_coverage:
-                    # Function call count found, add to structure
-                    # Add summary counts
-                    $sumfnccount->{$2} += $1;
+                    $testfnccount->{$2} += $1;
+            continue
 
-                    # Add test-specific counts
-                    if defined($testname):
-                        $testfnccount->{$2} += $1;
-                continue
+        match = re.match(r"^BRDA:(\d+),(\d+),(\d+),(\d+|-)", line)
+        if match:
+            # Branch coverage data found
+            if options.br_coverage:
+                lino, block, branch, taken = ($1, $2, $3, $4)
+                brcount = f"{block},{branch},{taken}:"
+                sumbrcount[lino] += brcount
+                # Add test-specific counts
+                if defined($testname):
+                    testbrcount[lino] += brcount
+            continue
 
-            match = re.match(r"^BRDA:(\d+),(\d+),(\d+),(\d+|-)", line)
-            if match:
-                # Branch coverage data found
-                if options.br_coverage:
-                    lino, block, branch, taken = ($1, $2, $3, $4)
-                    brcount = f"{block},{branch},{taken}:"
-                    sumbrcount[lino] += brcount
-                    # Add test-specific counts
-                    if defined($testname):
-                        testbrcount[lino] += brcount
+        match = re.match(r"^end_of_record", line)
+        if match:
+            # Found end of section marker
+            if $filename:
+                # Store current section data
+                if defined($testname):
+                    testdata[testname]    = testcount
+                    testfncdata[testname] = testfnccount
+                    testbrdata[testname]  = testbrcount
+
+                set_info_entry($data,
+                               $testdata, $sumcount, $funcdata, $checkdata,
+                               $testfncdata, $sumfnccount,
+                               $testbrdata,  $sumbrcount)
+                $result{$filename} = $data
                 continue
 
-            match = re.match(r"^end_of_record", line)
-            if match:
-                # Found end of section marker
-                if $filename:
-                    # Store current section data
-                    if defined($testname):
-                        testdata[testname]    = testcount
-                        testfncdata[testname] = testfnccount
-                        testbrdata[testname]  = testbrcount
-
-                    set_info_entry($data,
-                                   $testdata, $sumcount, $funcdata, $checkdata,
-                                   $testfncdata, $sumfnccount,
-                                   $testbrdata,  $sumbrcount)
-                    $result{$filename} = $data
-                    continue
-
     # Calculate hit and found values for lines and functions of each file
     for filename in list(result.keys()):
         data: Dict[str, object] = result[filename]
@@ -1762,6 +1566,56 @@ def combine_info_entries(entry1: InfoEntry,
     return result
 
 
+# Module globals set up by main() which read_info_file() depends on.
+# They are handed over to worker processes explicitly, since workers
+# need not be forked from the main process: spawned workers only
+# import this module and never run main().
+WORKER_STATE = ("options", "args", "data_to_stdout")
+
+
+def get_worker_state() -> Dict[str, object]:
+    """Return the module globals needed by the jobs of worker processes."""
+    module_globals = globals()
+    return {name: module_globals[name] for name in WORKER_STATE
+            if name in module_globals}
+
+
+def set_worker_state(state: Dict[str, object]):
+    """Install STATE (see get_worker_state()) in a worker process."""
+    globals().update(state)
+
+
+def read_info_files(tracefiles: List[Path], jobs: int = 1,
+                    *, reader: Callable[[Path], InfoData] = read_info_file,
+                    initializer: Optional[Callable] = None,
+                    initargs: Tuple = ()) -> InfoData:
+    """Read in the contents of all .info files specified by TRACEFILES
+    with READER and return the combined data. Up to JOBS files are read
+    in parallel by separate worker processes, which are set up by
+    INITIALIZER(*INITARGS) (by default with the state of this module).
+
+    Die on error.
+    """
+    if jobs > 1 and len(tracefiles) > 1:
+        if initializer is None:
+            initializer, initargs = set_worker_state, (get_worker_state(),)
+        with process_pool(min(jobs, len(tracefiles)),
+                          initializer, initargs) as executor:
+            # Results come back in the order of tracefiles
+            parsed = list(executor.map(reader, tracefiles))
+    else:
+        parsed = list(map(reader, tracefiles))
+
+    # Combine neighbouring results pairwise until one is left, so that
+    # no intermediate result is merged more than log2(len(parsed)) times
+    while len(parsed) > 1:
+        parsed = [combine_info_files(parsed[idx], parsed[idx + 1])
+                  if idx + 1 < len(parsed) else parsed[idx]
+                  for idx in range(0, len(parsed), 2)]
+
+    return parsed[0] if parsed else {}
+
+
 def add_traces() -> Tuple[int, int, int, int, int, int]:
     """ """
     global args
@@ -1769,17 +1623,13 @@ def add_traces() -> Tuple[int, int, int, int, int, int]:
 
     info("Combining tracefiles.")
 
-    total_trace: InfoData = None
-    for tracefile in args.add_tracefile:
-        current = read_info_file(tracefile)
-        total_trace = (current if total_trace is None
-                       else combine_info_files(total_trace, current))
+    total_trace = read_info_files(args.add_tracefile, args.jobs)
 
     # Write combined data
     if not data_to_stdout:
         info(f"Writing data to {args.output_filename}")
         try:
-            with Path(args.output_filename).open("wt") as fhandle:
+            with Path(args.output_filename).open("wt", buffering=INFO_BUFFER_SIZE) as fhandle:
                 result = write_info_file(fhandle, total_trace)
         except:
             die(f"ERROR: cannot write to {args.output_filename}!")
@@ -1905,7 +1755,7 @@ def extract() -> Tuple[int, int, int, int, int, int]:
         info(f"Extracted {extracted} files")
         info(f"Writing data to {args.output_filename}")
         try:
-            with Path(args.output_filename).open("wt") as fhandle:
+            with Path(args.output_filename).open("wt", buffering=INFO_BUFFER_SIZE) as fhandle:
                 result = write_info_file(fhandle, data)
         except:
             die(f"ERROR: cannot write to {args.output_filename}!")
@@ -1943,7 +1793,7 @@ def remove() -> Tuple[int, int, int, int, int, int]:
         info(f"Deleted {removed} files")
         info(f"Writing data to {args.output_filename}")
         try:
-            with Path(args.output_filename).open("wt") as fhandle:
+            with Path(args.output_filename).open("wt", buffering=INFO_BUFFER_SIZE) as fhandle:
                 result = write_info_file(fhandle, data)
         except:
             die(f"ERROR: cannot write to {args.output_filename}!")
@@ -2431,7 +2281,7 @@ def diff() -> Tuple[int, int, int, int, int, int]:
     if not data_to_stdout:
         info(f"Writing data to {args.output_filename}")
         try:
-            with Path(args.output_filename).open("wt") as fhandle:
+            with Path(args.output_filename).open("wt", buffering=INFO_BUFFER_SIZE) as fhandle:
                 result = write_info_file(fhandle, trace_data)
         except:
             die(f"ERROR: cannot write to {args.output_filename}!")
@@ -2467,29 +2317,23 @@ def read_diff(diff_file: Path) -> Tuple[Dict[str, Dict[int, int]], Dict[str, str
     if not os.access(diff_file, os.R_OK):
         die(f"ERROR: cannot read file {diff_file}!")
     # Check if this is really a plain file
-    fstatus = diff_file.stat()
-    if ! (-f _):
+    if not diff_file.is_file():
         die(f"ERROR: not a plain file: {diff_file}!")
 
-    # Check for .gz extension
-    if re.match(r"\.gz$", str(diff_file)):
-        # Check for availability of GZIP tool
-        if system_no_output(1, "gunzip", "-h")[0] != NO_ERROR:
-            die("ERROR: gunzip command not available!")
-        # Check integrity of compressed file
-        if system_no_output(1, "gunzip", "-t", str(diff_file))[0] != NO_ERROR:
-            die(f"ERROR: integrity check failed for compressed file {diff_file}!")
-        # Open compressed file
+    # Read in all lines, decompressing if needed
+    if diff_file.suffix == ".gz":
+        import gzip
         try:
-            fhandle = open("-|", "gunzip -c 'str(diff_file)'")
-        except:
-            or die("ERROR: cannot start gunzip to decompress file $_[0]!")
+            with gzip.open(diff_file, "rt") as fhandle:
+                lines = fhandle.read().splitlines()
+        except (OSError, EOFError):
+            die(f"ERROR: integrity check failed for compressed file {diff_file}!")
     else:
-        # Open decompressed file
         try:
-            fhandle = diff_file.open("rt")
+            with diff_file.open("rt") as fhandle:
+                lines = fhandle.read().splitlines()
         except:
-            die("ERROR: cannot read file $_[0]!")
+            die(f"ERROR: cannot read file {diff_file}!")
 
     # Parse diff file line by line
     filename: Optional[str] = None            # Name of common filename of diff section
@@ -2497,77 +2341,74 @@ def read_diff(diff_file: Path) -> Tuple[Dict[str, Dict[int, int]], Dict[str, str
     diff:     Dict[str, Dict[int, int]] = {}  # Resulting mapping filename -> line hash
     paths:    Dict[str, str]            = {}  # Resulting mapping old path -> new path
     in_block = False
-    with fhandle:
-        for line in fhandle:
-            line = line.rstrip("\n")
-
-            # Filename of old file:
-            # --- <filename> <date>
-            match = re.match(r"^--- (\S+)", line)
-            if match:
-                $file_old = strip_directories($1, args.strip)
-                continue
-
-            # Filename of new file:
-            # +++ <filename> <date>
-            match = re.match(r"^\+\+\+ (\S+)", line)
-            if match:
-                # Add last file to resulting hash
-                if filename:
-                    diff[filename] = mapping
-                    mapping = {}
-                $file_new = strip_directories($1, args.strip)
-                filename = $file_old;
-                paths[filename] = file_new
-                num_old = 1
-                num_new = 1
-                continue
+    for line in lines:
+        # Filename of old file:
+        # --- <filename> <date>
+        match = re.match(r"^--- (\S+)", line)
+        if match:
+            $file_old = strip_directories($1, args.strip)
+            continue
 
-            # Start of diff block:
-            # @@ -old_start,old_num, +new_start,new_num @@
-            match = re.match(r"^\@\@\s+-(\d+),(\d+)\s+\+(\d+),(\d+)\s+\@\@$", line)
-            if match:
-                in_block = True  # we are inside a diff block
-                while num_old < $1:
-                    mapping[num_new] = num_old
-                    num_old += 1
-                    num_new += 1
-                continue
+        # Filename of new file:
+        # +++ <filename> <date>
+        match = re.match(r"^\+\+\+ (\S+)", line)
+        if match:
+            # Add last file to resulting hash
+            if filename:
+                diff[filename] = mapping
+                mapping = {}
+            $file_new = strip_directories($1, args.strip)
+            filename = $file_old;
+            paths[filename] = file_new
+            num_old = 1
+            num_new = 1
+            continue
 
-            # Unchanged line
-            # <line starts with blank>
-            match = re.match(r"^ ", line)
-            if match:
-                if not in_block: continue
+        # Start of diff block:
+        # @@ -old_start,old_num, +new_start,new_num @@
+        match = re.match(r"^\@\@\s+-(\d+),(\d+)\s+\+(\d+),(\d+)\s+\@\@$", line)
+        if match:
+            in_block = True  # we are inside a diff block
+            while num_old < $1:
                 mapping[num_new] = num_old
                 num_old += 1
                 num_new += 1
-                continue
+            continue
 
-            # Line as seen in old file
-            # <line starts with '-'>
-            match = re.match(r"^-", line)
-            if match:
-                if not in_block: continue
-                num_old += 1
-                continue
+        # Unchanged line
+        # <line starts with blank>
+        match = re.match(r"^ ", line)
+        if match:
+            if not in_block: continue
+            mapping[num_new] = num_old
+            num_old += 1
+            num_new += 1
+            continue
 
-            # Line as seen in new file
-            # <line starts with '+'>
-            match = re.match(r"^\+", line)
-            if match:
-                if not in_block: continue
-                num_new += 1
-                continue
+        # Line as seen in old file
+        # <line starts with '-'>
+        match = re.match(r"^-", line)
+        if match:
+            if not in_block: continue
+            num_old += 1
+            continue
 
-            # Empty line
-            match = re.match(r"^$", line)
-            if match:
-                if not in_block: continue
-                mapping[num_new] = num_old
-                num_old += 1
-                num_new += 1
-                continue
+        # Line as seen in new file
+        # <line starts with '+'>
+        match = re.match(r"^\+", line)
+        if match:
+            if not in_block: continue
+            num_new += 1
+            continue
+
+        # Empty line
+        match = re.match(r"^$", line)
+        if match:
+            if not in_block: continue
+            mapping[num_new] = num_old
+            num_old += 1
+            num_new += 1
+            continue
 
     # Add final diff file section to resulting hash
     if filename:
@@ -2789,14 +2630,15 @@ def get_line_found_and_hit(dict: Dict[int, int]) -> Tuple[int, int]:
     greater than zero (hit) in a dict (linenumber -> execution count) as
     a list (found, hit)"""
     found = len(dict)
-    hit   = sum(1 for count in dict.values() if count > 0)
+    # (0).__lt__(count) is count > 0, evaluated without a Python-level loop
+    hit   = sum(map((0).__lt__, dict.values()))
     return (found, hit)
 
 
 def get_func_found_and_hit(sumfnccount: Dict[object, int]) -> Tuple[int, int]:
     """Return (fn_found, fn_hit) for sumfnccount"""
     fn_found = len(sumfnccount)
-    fn_hit   = sum(1 for ccount in sumfnccount.values() if ccount > 0)
+    fn_hit   = sum(map((0).__lt__, sumfnccount.values()))
     return (fn_found, fn_hit)
 
 
@@ -2950,14 +2792,22 @@ def rate(hit: int, found: Optional[int],
     if suffix    is None: suffix    = ""
     if width     is None: width     = 0
 
-    if found is None: or found == 0:
+    return _format_rate(hit, found or 0, suffix, precision, width)
+
+
+@lru_cache(maxsize=None)
+def _format_rate(hit: int, found: int, suffix: str, precision: int, width: int) -> str:
+    """rate() with all defaults resolved. Results are cached since the
+    same (hit, found) pairs are formatted over and over again for the
+    various overview pages."""
+    if found == 0:
         return "%*s" % (width, "-")
 
     rate = "%.*f" % (precision, hit * 100 / found)
     # Adjust rates if necessary
-    if int(rate) == 0 and hit > 0:
+    if int(float(rate)) == 0 and hit > 0:
         rate = "%.*f" % (precision, 1 / 10 ** precision)
-    elif int(rate) == 100 and hit != found:
+    elif int(float(rate)) == 100 and hit != found:
         rate = "%.*f" % (precision, 100 - 1 / 10 ** precision)
 
     return "%*s" % (width, rate + suffix)
@@ -2981,6 +2831,13 @@ def main(argv=sys.argv[1:]):
     """\
     """
     global tool_name, lcov_version, lcov_url
+    global options
+    global args
+    global data_to_stdout
+    global gcov_gkv
+    global ln_overall_found, ln_overall_hit
+    global fn_overall_found, fn_overall_hit
+    global br_overall_found, br_overall_hit
 
     def warn_handler(msg: str):
         global tool_name
@@ -3002,32 +2859,201 @@ def main(argv=sys.argv[1:]):
     # $SIG{'INT'}    = abort_handler
     # $SIG{'QUIT'}   = abort_handler
 
+    # Check command line for a configuration file name
+    Getopt::Long::Configure("pass_through", "no_auto_abbrev")
+    GetOptions("config-file=s": \Path(args.config_file),
+               "rc=s%":         \args.rc);
+    Getopt::Long::Configure("default");
+
+    # Remove spaces around rc options
+    args.rc = strip_spaces_in_options(args.rc)
+    # Read configuration file if available
+    $config = read_lcov_config_file(args.config_file)
+
+    if $config or args.rc:
+        # Copy configuration file and --rc values to variables
+        apply_config({
+            "lcov_gcov_dir":          \Path(options.gcov_dir),
+            "lcov_tmp_dir":           \options.tmp_dir,
+            "lcov_list_full_path":    \options.list_full_path,
+            "lcov_list_width":        \options.list_width,
+            "lcov_list_truncate_max": \options.list_truncate_max,
+            "lcov_branch_coverage":   \options.br_coverage,
+            "lcov_function_coverage": \options.fn_coverage,
+            "lcov_fail_under_lines":  \options.fail_under_lines,
+        })
+
     # Parse command line options
-    parser = argparse.ArgumentParser(prog=tool_name, description=main.__doc__,
-                                     epilog=f"For more information see: {lcov_url}",
-                                     add_help=False)
-    parser.add_argument("filename", type=str,
-        metavar="SOURCEFILE", help="SOURCEFILE")
-    parser.add_argument("-h", "-?", "--help", action="help",
-        help="Print this help, then exit")
-    parser.add_argument("-v", "--version", action="version",
-        version=f"%(prog)s: {lcov_version}",
-        help="Print version number, then exit")
-    parser.add_argument("-t", "--tab-size", type=int, default=4,
-        metavar="TABSIZE", help="Use TABSIZE spaces in place of tab")
-    parser.add_argument("-w", "--width", type=int, default=80,
-        metavar="WIDTH", help="Set width of output image to WIDTH pixel")
-    parser.add_argument("-o", "--output-filename", type=str,
-        metavar="FILENAME", help="Write image to FILENAME")
-
-    args = parser.parse_args(argv)
+    if (!GetOptions(
+            "directory|d|di=s"     => \args.directory,
+            "add-tracefile|a=s"    => \args.add_tracefile,
+            "list|l=s"             => \args.list,
+            "kernel-directory|k=s" => \args.kernel_directory,
+            "extract|e=s"          => \args.extract,
+            "remove|r=s"           => \args.remove,
+            "diff=s"               => \args.diff,
+            "convert-filenames"    => \args.convert_filenames,
+            "strip=i"              => \args.strip,
+            "capture|c"            => \args.capture,
+            "output-file|o=s"      => \args.output_filename,
+            "test-name|t=s"        => \args.test_name,
+            "zerocounters|z"       => \args.reset,
+            "quiet|q"              => \args.quiet,
+            "help|h|?"             => \args.help,
+            "version|v"            => \args.version,
+            "follow|f"             => \args.follow,
+            "path=s"               => \args.diff_path,
+            "base-directory|b=s"   => \Path(args.base_directory),
+            "checksum"             => \args.checksum,
+            "no-checksum"          => \args.no_checksum,
+            "compat-libtool"       => \args.compat_libtool,
+            "no-compat-libtool"    => \args.no_compat_libtool,
+            "gcov-tool=s"          => \args.gcov_tool,
+            "ignore-errors=s"      => \args.ignore_errors,
+            "initial|i"            => \args.initial,
+            "include=s"            => \args.include_patterns,
+            "exclude=s"            => \args.exclude_patterns,
+            "no-recursion"         => \args.no_recursion,
+            "to-package=s"         => \Path(args.to_package),
+            "from-package=s"       => \Path(args.from_package),
+            "no-markers"           => \args.no_markers,
+            "derive-func-data"     => \args.derive_func_data,
+            "debug"                => \args.debug,
+            "list-full-path"       => \options.list_full_path,
+            "no-list-full-path"    => \args.no_list_full_path,
+            "external"             => \args.external,
+            "no-external"          => \args.no_external,
+            "summary=s"            => \args.summary,
+            "compat=s"             => \args.compat,
+            "config-file=s"        => \Path(args.config_file),
+            "rc=s%"                => \args.rc,
+            "fail-under-lines=s"   => \options.fail_under_lines,
+            "jobs|j=i"             => \args.jobs,
+            )):
+        print(f"Use {tool_name} --help to get usage information", file=sys.stderr)
+        sys.exit(1)
+
+    # Merge options
+    if args.no_checksum is not None:
+        args.checksum = not args.no_checksum
+    if args.no_compat_libtool is not None:
+        args.compat_libtool = not args.no_compat_libtool
+        args.no_compat_libtool = None
+    if args.no_list_full_path is not None:
+        options.list_full_path = not args.no_list_full_path
+        del args.no_list_full_path
+    if args.no_external is not None:
+        args.external = False
+        del args.no_external
+
+    # Check for help option
+    if args.help:
+        print_usage(sys.stdout)
+        sys.exit(0)
+
+    # Check for version option
+    if args.version:
+        print(f"{tool_name}: {lcov_version}")
+        sys.exit(0)
+
+    # Check list width option
+    if options.list_width <= 40:
+        die("ERROR: lcov_list_width parameter out of range (needs to be "
+            "larger than 40)")
+
+    # Make sure number of jobs is within valid range
+    if args.jobs < 1:
+        die(f"ERROR: invalid number of jobs specified: {args.jobs}!")
+
+    # Normalize --path text
+    args.diff_path = re.sub(r"/$", "", args.diff_path)
+
+    # Check for valid options
+    check_options()
+
+    # Only --extract, --remove and --diff allow unnamed parameters
+    if args.ARGV and not (args.extract is not None or
+                          args.remove  is not None or
+                          args.diff    is not None or
+                          args.summary):
+        die("Extra parameter found: '{}'\n".format(" ".join(args.ARGV)) +
+            f"Use {tool_name} --help to get usage information")
+
+    # If set, indicates that data is written to stdout
     # Check for output filename
-    if not args.output_filename:
-        args.output_filename = f"{args.filename}.png"
+    data_to_stdout = not (args.output_filename and args.output_filename != "-")
+
+    if args.capture:
+        if data_to_stdout:
+            # Option that tells geninfo to write to stdout
+            args.output_filename = "-"
+
+    # Determine kernel directory for gcov data
+    if not args.from_package and not args.directory and (args.capture or args.reset):
+        gcov_gkv, options.gcov_dir = setup_gkv()
+
+    our $exit_code = 0
+    # Check for requested functionality
+    if args.reset:
+        data_to_stdout = False
+        # Differentiate between user space and kernel reset
+        if args.directory:
+            userspace_reset()
+        else:
+            kernel_reset()
+    elif args.capture:
+        # Capture source can be user space, kernel or package
+        if args.from_package:
+            package_capture()
+        elif args.directory:
+            userspace_capture()
+        else:
+            if args.initial:
+                if args.to_package:
+                    die("ERROR: --initial cannot be used together with --to-package")
+                kernel_capture_initial()
+            else:
+                kernel_capture()
+    elif args.add_tracefile:
+        (ln_overall_found, ln_overall_hit,
+         fn_overall_found, fn_overall_hit,
+         br_overall_found, br_overall_hit) = add_traces()
+    elif args.remove is not None:
+        (ln_overall_found, ln_overall_hit,
+         fn_overall_found, fn_overall_hit,
+         br_overall_found, br_overall_hit) = remove()
+    elif args.extract is not None:
+        (ln_overall_found, ln_overall_hit,
+         fn_overall_found, fn_overall_hit,
+         br_overall_found, br_overall_hit) = extract()
+    elif args.list:
+        data_to_stdout = False
+        listing()
+    elif args.diff is not None:
+        if len(args.ARGV) != 1:
+            die("ERROR: option --diff requires one additional argument!\n"
+                f"Use {tool_name} --help to get usage information")
+        (ln_overall_found, ln_overall_hit,
+         fn_overall_found, fn_overall_hit,
+         br_overall_found, br_overall_hit) = diff()
+    elif args.summary:
+        data_to_stdout = False
+        (ln_overall_found, ln_overall_hit,
+         fn_overall_found, fn_overall_hit,
+         br_overall_found, br_overall_hit) = summary()
+        $exit_code = check_rates(ln_overall_found, ln_overall_hit)
+
+    temp_cleanup()
+
+    if ln_overall_found is not None:
+        print_overall_rate(True, ln_overall_found, ln_overall_hit,
+                           True, fn_overall_found, fn_overall_hit,
+                           True, br_overall_found, br_overall_hit)
+    else:
+        if not args.list and not args.capture:
+            info("Done.")
 
-    try:
-    except BaseException as exc:
-        return str(exc)
+    return $exit_code
 
 
 if __name__.rpartition(".")[-1] == "__main__":
@@ -7,9 +7,11 @@ util
 
 """
 
-from typing import List, Dict, Iterable
+from typing import List, Tuple, Dict, Iterable, Callable, Optional
 import os
 import re
+import base64
+import hashlib
 from pathlib import Path
 
 from natsort import natsorted
@@ -163,6 +165,12 @@ def apply_config(ref: Dict):
             ref[key] = config[key]
 
 
+def config_bool(value: str) -> bool:
+    """Return the boolean meaning of a configuration file VALUE:
+    empty and "0" values are false, everything else is true."""
+    return value.strip() not in ("", "0")
+
+
 def parse_ignore_errors(ignore_errors: Optional[List], ignore: Dict[int, bool]):
     """Parse user input about which errors to ignore."""
 
@@ -234,6 +242,56 @@ def get_date_string() -> str:
     return "%d-%02d-%02d %02d:%02d:%02d" % (1900+year, month+1, day, hour, min, sec)
 
 
+# Supported line checksum algorithms
+CHECKSUM_ALGOS = ("md5", "sha256", "blake3")
+
+
+def line_checksum(line: str, algo: str = "md5") -> str:
+    """Return the checksum of a source code LINE as stored in DA: records,
+    i.e. the unpadded base64 encoding of a 16 byte digest computed with
+    checksum algorithm ALGO (MD5 by default, as Digest::MD5's md5_base64
+    does).
+    """
+    data = line.encode("utf-8")
+    if algo == "sha256":
+        digest = hashlib.sha256(data).digest()[:16]
+    elif algo == "blake3":
+        import blake3
+        digest = blake3.blake3(data).digest(length=16)
+    else:
+        digest = hashlib.md5(data).digest()
+    return base64.b64encode(digest).decode("ascii").rstrip("=")
+
+
+def check_checksum_algo(algo: str):
+    """Die if line checksum algorithm ALGO is unknown or unavailable."""
+    if algo not in CHECKSUM_ALGOS:
+        die(f"ERROR: unknown checksum algorithm: {algo} "
+            "(use {})".format(", ".join(CHECKSUM_ALGOS)))
+    if algo == "blake3":
+        try:
+            import blake3
+        except ImportError:
+            die("ERROR: the blake3 module is needed for --checksum-algo blake3")
+
+
+def process_pool(jobs: int, initializer: Optional[Callable] = None,
+                 initargs: Tuple = ()):
+    """Return an executor running jobs in up to JOBS worker processes.
+
+    Jobs must not rely on module globals set up by the parent process:
+    depending on the platform and Python version, workers are started
+    by spawn or forkserver rather than fork, and then merely import the
+    modules of the jobs. Such modules must therefore do their command
+    line processing in main() only. The state the jobs depend on is
+    handed over explicitly by INITIALIZER(*INITARGS), which is run in
+    each worker process before its first job.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=jobs,
+                               initializer=initializer, initargs=initargs)
+
+
 def warn(message, *, end="\n"):
     """ """
     import warnings